@@ -1,42 +1,100 @@
-from fastapi import FastAPI, UploadFile, File
+import time
+
+# measured from the first line so /ready can report import cost
+IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from pathlib import Path
+from typing import Optional
+import asyncio
+import json
+import os
 import shutil
+import tempfile
+import threading
 
-from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_qdrant import QdrantVectorStore
-from qdrant_client import QdrantClient
 from app.rag.confidence import compute_confidence
-import re
-
-from app.ingest.pipeline import ingest_file
-from app.db.mongo import log_query
+from app.rag.retriever import AsyncVectorRetriever
+from app.rag.embeddings import get_embedding_model
+from app.rag.query_cache import CachedQueryEmbeddings
+from app.rag.batcher import MicroBatchEmbeddings
+from app.rag.answer_cache import SemanticAnswerCache
+from app.rag.rerank import RERANK_ENABLED, RERANK_FETCH_K, RERANK_TOP_N
+from app.rag.context import build_context, estimate_tokens
+from app.rag.lexical import get_lexical_index
+from app.rag.keywords import keyword_coverage
+from app.rag.kb_state import get_kb_version
+
+from app.ingest.jobs import IngestJobQueue
+from app.db.mongo import backfill_query_rollups, ensure_indexes, query_log
 from app.db.mongo import get_query_analytics
+from app.db.vector_store import get_vector_store
 
 # =========================================================
 # CONFIG
 # =========================================================
 
-QDRANT_URL = "http://localhost:6333"
-COLLECTION_NAME = "hr_knowledge_base"
-
 UPLOAD_DIR = Path("data/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# load models + run one embedding and one tiny generation before /ready
+WARMUP_ON_STARTUP = True
+
+# a failed warm-up (e.g. Ollama not up yet) is retried with exponential
+# backoff until it succeeds or the API shuts down
+WARMUP_RETRY_SECONDS = 2.0
+WARMUP_RETRY_MAX_SECONDS = 60.0
+
+# "dense" (vector search only) or "hybrid" (vector + BM25, fused with RRF)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+
 
 # =========================================================
 # FASTAPI INIT
 # =========================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    await asyncio.to_thread(ensure_indexes)
+
+    await asyncio.to_thread(ensure_vector_indexes)
+
+    # count query logs written before the analytics rollups existed
+    await asyncio.to_thread(backfill_query_rollups)
+
+    query_log.start()
+
+    if WARMUP_ON_STARTUP:
+        warmup_task = asyncio.create_task(warm_up_until_ready())
+    else:
+        readiness["ready"] = True
+
+    yield
+
+    if WARMUP_ON_STARTUP and not warmup_task.done():
+        warmup_task.cancel()
+
+    if get_ingest_jobs.loaded():
+        get_ingest_jobs().shutdown()
+
+    # flush buffered query logs before exit
+    await query_log.stop()
+
+
 app = FastAPI(
     title="HR RAG API",
     description="HR Policy Retrieval & Question Answering System",
-    version="2.0"
+    version="2.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -52,37 +110,136 @@ app.add_middleware(
 # REQUEST MODELS
 # =========================================================
 
-class QuestionRequest(BaseModel):
+class ScopedRequest(BaseModel):
+    # optional retrieval scope, e.g. one handbook or only PDFs
+    source_file: Optional[str] = None
+    file_type: Optional[str] = None
+
+
+class QuestionRequest(ScopedRequest):
     question: str
     k: int = 6
 
 
-class SearchRequest(BaseModel):
+class SearchRequest(ScopedRequest):
     query: str
     k: int = 6
 
 
-class EmailRequest(BaseModel):
+class EmailRequest(ScopedRequest):
     request: str
     k: int = 6
 
 
+def request_filters(req: ScopedRequest):
+    """
+    Metadata filters for retrieval ({} searches the whole knowledge base).
+    """
+    filters = {}
+
+    if req.source_file:
+        filters["source_file"] = req.source_file
+
+    if req.file_type:
+        filters["file_type"] = req.file_type.lower().lstrip(".")
+
+    return filters
+
+
 # =========================================================
 # GLOBAL COMPONENTS
 # =========================================================
 
-print("Loading embeddings and LLM...")
+# Heavy components (sentence-transformers, Ollama client, ingest stack)
+# are built on first use, so importing this module stays cheap.
 
-embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
+def lazy(factory):
+    """
+    Build a component on first call (thread-safe), then reuse it.
 
-client = QdrantClient(QDRANT_URL)
+    Each component has its own lock, so loading one model never waits
+    on another. Async routes use `await get.aget()`, which builds in a
+    worker thread and keeps the event loop (and /health, /ready)
+    responsive while a model loads.
+    """
+    value = None
+    lock = threading.Lock()
+
+    def get():
+        nonlocal value
+        if value is None:
+            with lock:
+                if value is None:
+                    value = factory()
+        return value
+
+    async def aget():
+        if value is not None:
+            return value
+        return await asyncio.to_thread(get)
+
+    get.aget = aget
+    get.loaded = lambda: value is not None
+
+    return get
 
-llm = ChatOllama(
-    model="mistral",
-    temperature=0
-)
+
+@lazy
+def get_embeddings():
+
+    # shared LRU cache of query vectors for /ask, /search and /generate-email;
+    # cache misses from concurrent requests are embedded together
+    return CachedQueryEmbeddings(MicroBatchEmbeddings(get_embedding_model()))
+
+
+@lazy
+def get_llm():
+
+    from langchain_ollama import ChatOllama
+
+    return ChatOllama(
+        model="mistral",
+        temperature=0
+    )
+
+
+@lazy
+def get_ingest_jobs():
+
+    # background ingestion (uploads return a job id immediately)
+    return IngestJobQueue(ingest_upload)
+
+
+def ingest_upload(path: Path, progress, source_file: str):
+    """
+    Ingest an upload from its temporary path, then keep it under its
+    real name. Runs after earlier jobs for the same file have finished.
+    """
+    from app.ingest.pipeline import ingest_file
+
+    try:
+        stats = ingest_file(path, progress, source_file=source_file)
+        os.replace(path, UPLOAD_DIR / source_file)
+        return stats
+
+    finally:
+        path.unlink(missing_ok=True)
+
+
+@lazy
+def get_reranker():
+
+    from app.rag.rerank import Reranker
+
+    # cross-encoder over the over-fetched candidates in /ask
+    return Reranker()
+
+
+# Qdrant server or in-process NumPy index, chosen by VECTOR_BACKEND
+vector_store = get_vector_store()
+
+# semantic cache of /ask responses, invalidated by ingestion
+answer_cache = SemanticAnswerCache()
 
 prompt = ChatPromptTemplate.from_messages([
     (
@@ -111,7 +268,9 @@ prompt = ChatPromptTemplate.from_messages([
     )
 ])
 
-chain = prompt | llm | StrOutputParser()
+@lazy
+def get_chain():
+    return prompt | get_llm() | StrOutputParser()
 
 
 email_prompt = ChatPromptTemplate.from_messages([
@@ -138,29 +297,159 @@ email_prompt = ChatPromptTemplate.from_messages([
     )
 ])
 
-email_chain = email_prompt | llm | StrOutputParser()
+@lazy
+def get_email_chain():
+    return email_prompt | get_llm() | StrOutputParser()
+
+
+# =========================================================
+# WARM-UP / READINESS
+# =========================================================
+
+IMPORT_SECONDS = round(time.perf_counter() - IMPORT_STARTED, 3)
+
+print(f"API module imported in {IMPORT_SECONDS}s")
+
+readiness = {
+    "ready": False,
+    "import_seconds": IMPORT_SECONDS,
+    "warmup_seconds": None,
+    "time_to_ready_seconds": None,
+    "warmup_attempts": 0,
+    "error": None
+}
+
+
+def warm_up():
+    """
+    Load the embedding model and Mistral, then run one embedding and a
+    one-token generation so the first real request pays neither.
+    Returns whether it succeeded.
+    """
+    from langchain_ollama import ChatOllama
+
+    started = time.perf_counter()
+    readiness["warmup_attempts"] += 1
+
+    try:
+        get_embeddings().embeddings.embed_query("warm-up")
 
-print("System ready.")
+        if RERANK_ENABLED:
+            get_reranker().model.predict([("warm-up", "warm-up")])
+
+        get_chain()
+        get_email_chain()
+
+        ChatOllama(model="mistral", temperature=0, num_predict=1).invoke("hi")
+
+    except Exception as e:
+        readiness["error"] = f"{type(e).__name__}: {e}"
+        print(f"⚠️ Warm-up failed: {readiness['error']}")
+        return False
+
+    readiness["error"] = None
+    readiness["warmup_seconds"] = round(time.perf_counter() - started, 3)
+    readiness["time_to_ready_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 3)
+    readiness["ready"] = True
+
+    print(
+        f"System ready: warm-up {readiness['warmup_seconds']}s, "
+        f"time to ready {readiness['time_to_ready_seconds']}s"
+    )
+
+    return True
+
+
+async def warm_up_until_ready():
+    """
+    Run warm_up in a worker thread until it succeeds; cancelled on shutdown.
+    """
+    delay = WARMUP_RETRY_SECONDS
+
+    while not await asyncio.to_thread(warm_up):
+
+        print(f"🔁 Retrying warm-up in {delay:.1f}s...")
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
 
 
 # =========================================================
 # VECTORSTORE LOADER (CRITICAL FIX)
 # =========================================================
 
-def get_vectorstore():
+# an empty knowledge base is re-checked at most this often, so a
+# collection created by the bulk ingest script is still picked up
+EMPTY_KB_RECHECK_SECONDS = 5.0
 
-    if not client.collection_exists(COLLECTION_NAME):
-        return None
+# process-wide handle, rebuilt only when the knowledge-base version moves
+vectorstore_cache = {
+    "version": None,
+    "handle": None,
+    "checked_at": 0.0
+}
 
-    return QdrantVectorStore(
-        client=client,
-        collection_name=COLLECTION_NAME,
-        embedding=embeddings,
-        content_payload_key="page_content",
-        metadata_payload_key="metadata"
-        
+
+def ensure_vector_indexes():
+    """
+    Payload indexes for an existing collection, at startup.
+    """
+    try:
+        if vector_store.exists():
+            vector_store.ensure_payload_indexes()
+
+    except Exception as e:
+        print(f"⚠️ Payload index setup failed: {e}")
+
+
+async def get_vectorstore():
+
+    version = get_kb_version()
+    cached = vectorstore_cache
+
+    stale = cached["version"] != version or (
+        cached["handle"] is None
+        and time.monotonic() - cached["checked_at"] > EMPTY_KB_RECHECK_SECONDS
+    )
+
+    if not stale:
+        return cached["handle"]
+
+    handle = None
+
+    if await vector_store.aexists():
+        handle = AsyncVectorRetriever(
+            store=vector_store,
+            embeddings=await get_embeddings.aget(),
+            content_payload_key="page_content",
+            metadata_payload_key="metadata",
+            lexical=get_lexical_index() if RETRIEVAL_MODE == "hybrid" else None
+        )
+
+    cached.update(
+        version=version,
+        handle=handle,
+        checked_at=time.monotonic()
+    )
+
+    return handle
+
+
+async def collection_dropped():
+    """
+    After a failed search: True (and the cached handle is dropped) when
+    the collection is gone, e.g. removed by `ingest_hr_docs --rebuild`.
+    """
+    if await vector_store.aexists():
+        return False
+
+    vectorstore_cache.update(
+        handle=None,
+        checked_at=time.monotonic()
     )
 
+    return True
+
 
 # =========================================================
 # HELPERS
@@ -178,54 +467,36 @@ def extract_source(doc):
         
     return "Unknown Source"
 
-def format_docs(docs):
+def prompt_tokens(template, packed, **inputs):
     """
-    Format documents into context string.
+    Estimated prompt size: instructions + inputs + packed context.
     """
+    messages = template.format_messages(context=packed["context"], **inputs)
 
-    formatted = []
-
-    for d in docs:
-
-        source = extract_source(d) or "unknown"
-
-        formatted.append(
-            f"[Source: {source}]\n{d.page_content}"
-        )
+    return estimate_tokens("\n".join(m.content for m in messages))
 
-    return "\n\n".join(formatted)
 
-
-def extract_keywords(text: str):
+def sse_event(event: str, data: dict):
     """
-    Extract important keywords from question.
-    Simple production-safe keyword extraction.
+    Encode one Server-Sent Event.
     """
-    words = re.findall(r"\b[a-zA-Z]{4,}\b", text.lower())
-
-    stopwords = {
-        "what", "when", "where", "which", "their", "there",
-        "about", "policy", "please", "tell", "does", "have",
-        "this", "that", "with", "from"
-    }
-
-    return [w for w in words if w not in stopwords]
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
-def keyword_coverage(question: str, docs):
+def generation_error(error: Exception):
     """
-    Measure keyword coverage inside retrieved chunks.
+    Final "error" event for a stream whose generation failed midway,
+    so clients don't mistake the partial text for a full answer.
     """
-    keywords = extract_keywords(question)
+    message = f"{type(error).__name__}: {error}"
 
-    if not keywords:
-        return 0, 0
+    print(f"⚠️ Streaming generation failed: {message}")
 
-    combined = " ".join([d.page_content.lower() for d in docs])
+    return sse_event("error", {"error": message})
 
-    hits = sum(1 for k in keywords if k in combined)
 
-    return hits, len(keywords)
+def elapsed_ms(started: float):
+    return round((time.perf_counter() - started) * 1000, 1)
 
 
 # =========================================================
@@ -233,26 +504,68 @@ def keyword_coverage(question: str, docs):
 # =========================================================
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready():
+    """
+    Readiness (vs /health liveness): 503 until warm-up has finished.
+    """
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content=readiness)
+
+    return readiness
+
+
+@app.get("/cache-stats")
+async def cache_stats():
+    return {
+        "query_embeddings": get_embeddings().stats() if get_embeddings.loaded() else None,
+        "query_batcher": get_embeddings().embeddings.stats() if get_embeddings.loaded() else None,
+        "answers": answer_cache.stats()
+    }
+
+
+@app.get("/query-log-stats")
+async def query_log_stats():
+    return query_log.stats()
+
+
+@app.get("/rerank-stats")
+async def rerank_stats():
+    return {
+        "enabled": RERANK_ENABLED,
+        "fetch_k": RERANK_FETCH_K,
+        "top_n": RERANK_TOP_N,
+        **(get_reranker().stats() if get_reranker.loaded() else {})
+    }
+
+
 # =========================================================
 # SEARCH ENDPOINT
 # =========================================================
 
 @app.post("/search")
-def search(req: SearchRequest):
+async def search(req: SearchRequest):
 
-    vectorstore = get_vectorstore()
+    vectorstore = await get_vectorstore()
 
     if vectorstore is None:
         return {"results": []}
 
-    docs = vectorstore.similarity_search(
-        req.query,
-        k=req.k
-    )
+    try:
+        docs = await vectorstore.asimilarity_search(
+            req.query,
+            k=req.k,
+            filters=request_filters(req)
+        )
+
+    except Exception:
+        if not await collection_dropped():
+            raise
+        return {"results": []}
 
     return {
         "results": [
@@ -269,39 +582,77 @@ def search(req: SearchRequest):
 # ASK ENDPOINT (MAIN RAG)
 # =========================================================
 
-@app.post("/ask")
-def ask(req: QuestionRequest):
+def empty_kb_answer(req: QuestionRequest):
+
+    final_answer = "Knowledge base is empty. Please upload documents first."
+
+    query_log.log(
+        question=req.question,
+        answer=final_answer,
+        sources=[],
+        confidence=0.0
+    )
+
+    return {
+        "final": {
+            "answer": final_answer,
+            "sources": [],
+            "confidence": 0.0,
+            "cached": False
+        }
+    }
 
-    vectorstore = get_vectorstore()
+
+async def prepare_ask(req: QuestionRequest):
+    """
+    Everything in /ask before generation: cache lookup, retrieval,
+    confidence and context. Early exits come back as a finished
+    response under "final".
+    """
+
+    vectorstore = await get_vectorstore()
 
     if vectorstore is None:
+        return empty_kb_answer(req)
+
+    # semantic answer cache (query vector is reused by the search below)
+    question_vector = await vectorstore.aembed_query(req.question)
 
-        final_answer = "Knowledge base is empty. Please upload documents first."
+    cached = answer_cache.lookup(question_vector, req.k, request_filters(req))
 
-        log_query(
+    if cached is not None:
+
+        query_log.log(
             question=req.question,
-            answer=final_answer,
-            sources=[],
-            confidence=0.0
+            answer=cached["answer"],
+            sources=cached["sources"],
+            confidence=cached["confidence"]
         )
 
-        return {
-            "answer": final_answer,
-            "sources": [],
-            "confidence": 0.0
-        }
+        return {"final": {**cached, "cached": True}}
 
-    # similarity search with score
-    results = vectorstore.similarity_search_with_score(
-        req.question,
-        k=req.k
-    )
+    # over-fetch when reranking, only the best top_n reach the prompt
+    top_n = min(req.k, RERANK_TOP_N) if RERANK_ENABLED else req.k
+
+    # similarity search with score (dense or hybrid)
+    try:
+        results = await vectorstore.asearch_with_score(
+            req.question,
+            question_vector,
+            k=max(req.k, RERANK_FETCH_K) if RERANK_ENABLED else req.k,
+            filters=request_filters(req)
+        )
+
+    except Exception:
+        if not await collection_dropped():
+            raise
+        return empty_kb_answer(req)
 
     if not results:
 
         final_answer = "Not specified in policy."
 
-        log_query(
+        query_log.log(
             question=req.question,
             answer=final_answer,
             sources=[],
@@ -309,21 +660,41 @@ def ask(req: QuestionRequest):
         )
 
         return {
-            "answer": final_answer,
-            "sources": [],
-            "confidence": 0.0
+            "final": {
+                "answer": final_answer,
+                "sources": [],
+                "confidence": 0.0,
+                "cached": False
+            }
         }
 
-    docs = []
-    scores = []
+    reranked = None
 
-    for doc, score in results:
+    if RERANK_ENABLED:
+        reranker = await get_reranker.aget()
+        reranked = await reranker.arerank(
+            req.question,
+            [doc for doc, _ in results],
+            top_n
+        )
+
+    if reranked is not None:
+
+        docs = [doc for doc, _ in reranked]
+        scores = [score for _, score in reranked]
+
+    else:
+
+        # reranking off or over budget: vector-search order
+        docs = []
+        scores = []
 
-        docs.append(doc)
+        for doc, score in results[:top_n]:
 
-        # convert Qdrant distance → similarity
-        similarity = 1 - score
-        scores.append(similarity)
+            docs.append(doc)
+
+            # both backends return cosine similarity (higher is better)
+            scores.append(min(max(score, 0.0), 1.0))
 
     avg_score = sum(scores) / len(scores)
 
@@ -339,43 +710,126 @@ def ask(req: QuestionRequest):
         keyword_hits=keyword_hits,
         expected_keywords=expected_keywords,
         retrieved_chunks=len(docs),
-        k=req.k
+        k=top_n
     )
 
-    # build context
-    context = format_docs(docs)
-
-    answer = chain.invoke({
-        "context": context,
-        "question": req.question
-    })
-
-    final_answer = answer.strip()
+    # merged, deduplicated context within the token budget
+    packed = build_context(docs)
 
     # extract sources
     sources = list(set([
         extract_source(d)
-        for d in docs
+        for d in packed["docs"]
     ]))
 
+    return {
+        "final": None,
+        "question_vector": question_vector,
+        "context": packed["context"],
+        "prompt_tokens": prompt_tokens(prompt, packed, question=req.question),
+        "sources": sources,
+        "confidence": confidence
+    }
+
+
+async def finish_ask(req: QuestionRequest, prepared, answer: str):
+    """
+    Log, cache and shape the /ask response once the answer is complete.
+    """
+
+    final_answer = answer.strip()
+
     # ✅ QUERY LOGGING (CRITICAL ADDITION)
-    log_query(
+    query_log.log(
         question=req.question,
         answer=final_answer,
-        sources=sources,
-        confidence=confidence
+        sources=prepared["sources"],
+        confidence=prepared["confidence"],
+        prompt_tokens=prepared["prompt_tokens"]
     )
 
-    return {
+    response = {
         "answer": final_answer,
-        "sources": sources,
-        "confidence": confidence
+        "sources": prepared["sources"],
+        "confidence": prepared["confidence"]
     }
 
+    answer_cache.store(prepared["question_vector"], req.k, response, request_filters(req))
+
+    return {**response, "prompt_tokens": prepared["prompt_tokens"], "cached": False}
+
+
+@app.post("/ask")
+async def ask(req: QuestionRequest):
+
+    prepared = await prepare_ask(req)
+
+    if prepared["final"] is not None:
+        return prepared["final"]
+
+    chain = await get_chain.aget()
+
+    answer = await chain.ainvoke({
+        "context": prepared["context"],
+        "question": req.question
+    })
+
+    return await finish_ask(req, prepared, answer)
+
+
+@app.post("/ask/stream")
+async def ask_stream(req: QuestionRequest):
+    """
+    /ask as Server-Sent Events: "token" events while Mistral generates,
+    then one "done" event with the full response (sources, confidence),
+    or an "error" event if generation fails midway.
+    """
+
+    started = time.perf_counter()
+
+    prepared = await prepare_ask(req)
+
+    async def events():
+
+        if prepared["final"] is not None:
+            yield sse_event("token", {"token": prepared["final"]["answer"]})
+            yield sse_event("done", {**prepared["final"], "ttft_ms": elapsed_ms(started)})
+            return
+
+        chain = await get_chain.aget()
+
+        parts = []
+        ttft_ms = None
+
+        try:
+            async for token in chain.astream({
+                "context": prepared["context"],
+                "question": req.question
+            }):
+
+                if ttft_ms is None:
+                    ttft_ms = elapsed_ms(started)
+
+                parts.append(token)
+                yield sse_event("token", {"token": token})
+
+        except Exception as e:
+            # partial answers are neither logged nor cached
+            yield generation_error(e)
+            return
+
+        # logged + cached only once the stream completes
+        response = await finish_ask(req, prepared, "".join(parts))
+
+        yield sse_event("done", {**response, "ttft_ms": ttft_ms})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 # =========================================================
 # DOCUMENT UPLOAD ENDPOINT
 # =========================================================
 
+# plain def on purpose: the file copy is blocking I/O
 @app.post("/upload-doc")
 def upload_doc(file: UploadFile = File(...)):
 
@@ -387,108 +841,122 @@ def upload_doc(file: UploadFile = File(...)):
             "error": "Unsupported file type"
         }
 
-    save_path = UPLOAD_DIR / file.filename
+    # unique per upload: a queued re-upload must not overwrite the file
+    # an earlier job is still parsing
+    fd, save_path = tempfile.mkstemp(
+        prefix=".upload-",
+        suffix=suffix,
+        dir=UPLOAD_DIR
+    )
 
-    with open(save_path, "wb") as buffer:
+    with os.fdopen(fd, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
 
-    stats = ingest_file(save_path)
+    job_id = get_ingest_jobs().submit(Path(save_path), source_file=Path(file.filename).name)
 
     return {
-        "status": "success",
+        "status": "queued",
         "file": file.filename,
-        "stats": stats
+        "job_id": job_id
     }
 
-@app.get("/debug-qdrant")
-def debug_qdrant():
 
-    result = client.scroll(
-        collection_name=COLLECTION_NAME,
-        limit=5,
-        with_payload=True,
-        with_vectors=False
-    )
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+
+    job = get_ingest_jobs().get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+
+    return job
+
+@app.get("/debug-qdrant")
+async def debug_qdrant():
 
-    points = result[0]
+    points = await vector_store.asample(5)
 
     output = []
 
-    for p in points:
+    for point_id, payload in points:
         output.append({
-            "id": str(p.id),
-            "payload": p.payload
+            "id": point_id,
+            "payload": payload
         })
 
     return output
 
 
 @app.get("/debug/raw")
-def debug_raw():
+async def debug_raw():
 
-    result = client.scroll(
-        collection_name=COLLECTION_NAME,
-        limit=3,
-        with_payload=True,
-        with_vectors=False
-    )
-
-    points = result[0]
+    points = await vector_store.asample(3)
 
     output = []
 
-    for p in points:
+    for point_id, payload in points:
 
         output.append({
-            "id": p.id,
-            "payload": p.payload
+            "id": point_id,
+            "payload": payload
         })
 
     return output
 
 
-@app.post("/generate-email")
-def generate_email(req: EmailRequest):
-
-    vectorstore = get_vectorstore()
-
-    if vectorstore is None:
-        return {
+def empty_kb_email():
+    return {
+        "final": {
             "email": "Knowledge base empty.",
             "sources": [],
             "confidence": 0.0
         }
+    }
 
-    docs = vectorstore.similarity_search(
-        req.request,
-        k=req.k
-    )
+
+async def prepare_email(req: EmailRequest):
+    """
+    Retrieval, sources and confidence for /generate-email.
+    """
+
+    vectorstore = await get_vectorstore()
+
+    if vectorstore is None:
+        return empty_kb_email()
+
+    try:
+        docs = await vectorstore.asimilarity_search(
+            req.request,
+            k=req.k,
+            filters=request_filters(req)
+        )
+
+    except Exception:
+        if not await collection_dropped():
+            raise
+        return empty_kb_email()
 
     if not docs:
         return {
-            "email": "Unable to generate email.",
-            "sources": [],
-            "confidence": 0.0
+            "final": {
+                "email": "Unable to generate email.",
+                "sources": [],
+                "confidence": 0.0
+            }
         }
 
-    context = format_docs(docs)
-
-    email = email_chain.invoke({
-        "context": context,
-        "request": req.request
-    })
+    packed = build_context(docs)
 
     # Extract sources
     sources = list(set([
         extract_source(d)
-        for d in docs
+        for d in packed["docs"]
         if extract_source(d)
     ]))
 
     # Simple confidence calculation
     avg_rerank_score = 0.8
-    keyword_hits = len(req.request.split())
-    expected_keywords = len(req.request.split())
+    keyword_hits, expected_keywords = keyword_coverage(req.request, docs)
     retrieved_chunks = len(docs)
 
     confidence = compute_confidence(
@@ -500,12 +968,83 @@ def generate_email(req: EmailRequest):
     )
 
     return {
-        "email": email.strip(),
+        "final": None,
+        "context": packed["context"],
+        "prompt_tokens": prompt_tokens(email_prompt, packed, request=req.request),
         "sources": sources,
         "confidence": confidence
     }
 
 
+@app.post("/generate-email")
+async def generate_email(req: EmailRequest):
+
+    prepared = await prepare_email(req)
+
+    if prepared["final"] is not None:
+        return prepared["final"]
+
+    chain = await get_email_chain.aget()
+
+    email = await chain.ainvoke({
+        "context": prepared["context"],
+        "request": req.request
+    })
+
+    return {
+        "email": email.strip(),
+        "sources": prepared["sources"],
+        "confidence": prepared["confidence"],
+        "prompt_tokens": prepared["prompt_tokens"]
+    }
+
+
+@app.post("/generate-email/stream")
+async def generate_email_stream(req: EmailRequest):
+
+    started = time.perf_counter()
+
+    prepared = await prepare_email(req)
+
+    async def events():
+
+        if prepared["final"] is not None:
+            yield sse_event("token", {"token": prepared["final"]["email"]})
+            yield sse_event("done", {**prepared["final"], "ttft_ms": elapsed_ms(started)})
+            return
+
+        chain = await get_email_chain.aget()
+
+        parts = []
+        ttft_ms = None
+
+        try:
+            async for token in chain.astream({
+                "context": prepared["context"],
+                "request": req.request
+            }):
+
+                if ttft_ms is None:
+                    ttft_ms = elapsed_ms(started)
+
+                parts.append(token)
+                yield sse_event("token", {"token": token})
+
+        except Exception as e:
+            yield generation_error(e)
+            return
+
+        yield sse_event("done", {
+            "email": "".join(parts).strip(),
+            "sources": prepared["sources"],
+            "confidence": prepared["confidence"],
+            "prompt_tokens": prepared["prompt_tokens"],
+            "ttft_ms": ttft_ms
+        })
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.get("/analytics")
 def analytics():
 
@@ -1,6 +1,11 @@
-from pymongo import MongoClient
-from datetime import datetime
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
+from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timedelta
 from collections import Counter
+from pathlib import Path
+import asyncio
+import json
 
 MONGO_URL = "mongodb://localhost:27017"
 DB_NAME = "hr_rag"
@@ -13,6 +18,109 @@ docs_col = db[COLLECTION]
 
 query_logs_col = db["query_logs"]
 
+# pre-aggregated analytics, updated incrementally on every logged query
+ROLLUP_COLLECTION = "query_rollups"
+QUESTION_COUNTS = "query_question_counts"
+SOURCE_COUNTS = "query_source_counts"
+
+rollup_col = db[ROLLUP_COLLECTION]
+question_counts_col = db[QUESTION_COUNTS]
+source_counts_col = db[SOURCE_COUNTS]
+
+# query_logs layout: a time-series collection (created on first start
+# only) and/or automatic expiry after QUERY_LOGS_RETENTION_DAYS
+QUERY_LOGS_TIMESERIES = False
+QUERY_LOGS_RETENTION_DAYS = None
+
+# async handle for the API request path
+async_client = AsyncIOMotorClient(MONGO_URL)
+async_db = async_client[DB_NAME]
+
+
+
+# =========================================================
+# INDEX MANAGEMENT
+# =========================================================
+
+def is_timeseries(col):
+    return "timeseries" in col.options()
+
+
+def ensure_query_logs_collection():
+    """
+    Create query_logs as a time-series collection when configured.
+    Existing regular collections are left alone (Mongo can't convert them).
+    """
+    if not QUERY_LOGS_TIMESERIES:
+        return
+
+    if "query_logs" in db.list_collection_names():
+
+        if not is_timeseries(query_logs_col):
+            print("⚠️ query_logs exists as a regular collection; time-series layout not applied")
+
+        return
+
+    kwargs = {
+        "timeseries": {"timeField": "timestamp", "granularity": "seconds"}
+    }
+
+    if QUERY_LOGS_RETENTION_DAYS:
+        kwargs["expireAfterSeconds"] = QUERY_LOGS_RETENTION_DAYS * 86400
+
+    db.create_collection("query_logs", **kwargs)
+
+    print("🗄 Created time-series collection query_logs")
+
+
+def ensure_retention_index(col, field: str, seconds: int):
+    """
+    TTL index on `field`; an existing plain/TTL index is switched to the
+    new retention with collMod instead of failing.
+    """
+    try:
+        col.create_index(field, expireAfterSeconds=seconds)
+
+    except OperationFailure as e:
+
+        # IndexOptionsConflict / IndexKeySpecsConflict
+        if e.code not in (85, 86):
+            raise
+
+        db.command(
+            "collMod",
+            col.name,
+            index={"keyPattern": {field: 1}, "expireAfterSeconds": seconds}
+        )
+
+
+def ensure_indexes():
+    """
+    Idempotent startup index setup for every collection we query.
+    """
+    try:
+        ensure_query_logs_collection()
+
+        docs_col.create_index("source_file")
+        docs_col.create_index("doc_id", unique=True)
+
+        question_counts_col.create_index([("count", -1)])
+        source_counts_col.create_index([("count", -1)])
+
+        # time-series collections expire through the collection option
+        if not is_timeseries(query_logs_col):
+
+            if QUERY_LOGS_RETENTION_DAYS:
+                ensure_retention_index(
+                    query_logs_col,
+                    "timestamp",
+                    QUERY_LOGS_RETENTION_DAYS * 86400
+                )
+            else:
+                query_logs_col.create_index("timestamp")
+
+    except PyMongoError as e:
+        print(f"⚠️ Mongo index setup failed: {e}")
 
 
 def store_doc_metadata(doc_id, source_file, chunk_id, metadata):
@@ -28,82 +136,549 @@ def store_doc_metadata(doc_id, source_file, chunk_id, metadata):
     docs_col.insert_one(record)
 
 
+def store_doc_metadata_bulk(records):
+    """
+    Write chunk metadata for a whole batch in one round trip.
+
+    Each record needs doc_id, source_file, chunk_id and metadata.
+    Upserts by doc_id, so re-ingesting the same chunks never duplicates rows.
+    """
+    if not records:
+        return 0
+
+    now = datetime.utcnow()
+
+    ops = [
+        UpdateOne(
+            {"doc_id": r["doc_id"]},
+            {
+                "$set": {
+                    "chunk_id": r["chunk_id"],
+                    "source_file": r["source_file"],
+                    "metadata": r["metadata"]
+                },
+                "$setOnInsert": {"ingested_at": now}
+            },
+            upsert=True
+        )
+        for r in records
+    ]
+
+    result = docs_col.bulk_write(ops, ordered=False)
+
+    return result.upserted_count + result.modified_count
+
+
+def update_doc_metadata(updates):
+    """
+    Refresh the metadata (and chunk_id) of chunks that were not re-written
+    on re-ingest: {doc_id: metadata}.
+    """
+    if not updates:
+        return 0
+
+    ops = [
+        UpdateOne(
+            {"doc_id": doc_id},
+            {"$set": {"chunk_id": metadata["chunk_id"], "metadata": metadata}}
+        )
+        for doc_id, metadata in updates.items()
+    ]
+
+    return docs_col.bulk_write(ops, ordered=False).modified_count
+
+
+def delete_doc_metadata(doc_ids):
+    """
+    Remove chunk metadata of chunks deleted from the vector store.
+    """
+    docs_col.delete_many({"doc_id": {"$in": list(doc_ids)}})
+
+
+def clear_doc_metadata():
+    """
+    Remove all chunk metadata (full rebuild of the knowledge base).
+    """
+    return docs_col.delete_many({}).deleted_count
+
+
 def get_doc_chunks(source_file):
     return list(docs_col.find({"source_file": source_file}))
 
-def log_query(question, answer, sources, confidence):
-
-    record = {
+def query_record(question, answer, sources, confidence, prompt_tokens=None):
+    return {
         "question": question,
         "answer": answer,
         "sources": sources,
         "confidence": confidence,
+        "prompt_tokens": prompt_tokens,
         "timestamp": datetime.utcnow()
     }
 
-    query_logs_col.insert_one(record)
 
+def rollup_ops(records):
+    """
+    Bulk-write operations that fold a batch of query records into the
+    rollup collections: {collection name: [UpdateOne, ...]}.
+    """
+    question_counts = Counter(r["question"] for r in records)
+    source_counts = Counter(src for r in records for src in r.get("sources", []))
+
+    ops = {
+        ROLLUP_COLLECTION: [
+            UpdateOne(
+                {"_id": "totals"},
+                {
+                    "$inc": {
+                        "total_queries": len(records),
+                        "confidence_sum": sum(r["confidence"] for r in records)
+                    }
+                },
+                upsert=True
+            )
+        ],
+        QUESTION_COUNTS: [
+            UpdateOne({"_id": q}, {"$inc": {"count": n}}, upsert=True)
+            for q, n in question_counts.items()
+        ],
+        SOURCE_COUNTS: [
+            UpdateOne({"_id": src}, {"$inc": {"count": n}}, upsert=True)
+            for src, n in source_counts.items()
+        ]
+    }
 
+    return {name: col_ops for name, col_ops in ops.items() if col_ops}
 
-query_logs_col = db["query_logs"]
 
+# =========================================================
+# BUFFERED QUERY LOGGING (API REQUEST PATH)
+# =========================================================
 
-def log_query(question, answer, sources, confidence):
-    record = {
-        "question": question,
-        "answer": answer,
-        "sources": sources,
-        "confidence": confidence,
-        "timestamp": datetime.utcnow()
-    }
+QUERY_LOG_BUFFER_SIZE = 10000
+QUERY_LOG_FLUSH_SIZE = 200
+QUERY_LOG_FLUSH_INTERVAL = 2.0
+QUERY_LOG_SPILL_PATH = Path("data/cache/query_logs_spill.jsonl")
 
-    query_logs_col.insert_one(record)
+# records that arrive while the buffer is full wait here for the
+# flusher to spill them; beyond this they are dropped and counted
+QUERY_LOG_OVERFLOW_SIZE = 1000
 
 
-def get_query_analytics():
+_STOP = object()
+
+
+class QueryLogBuffer:
+    """
+    In-process buffer for query logs.
+
+    log() only enqueues, so requests never wait on Mongo. A background
+    task flushes with insert_many once QUERY_LOG_FLUSH_SIZE records are
+    queued or QUERY_LOG_FLUSH_INTERVAL seconds pass, and on shutdown.
+    When the buffer is full (or a flush fails) records are spilled to a
+    local JSONL file by the flusher, in a worker thread, so requests
+    never do file I/O either; if that fails too they are dropped and
+    counted.
+    Only records Mongo did not store are spilled, so replaying the file
+    never duplicates a log.
+    """
+
+    def __init__(
+        self,
+        db,
+        max_size: int = QUERY_LOG_BUFFER_SIZE,
+        flush_size: int = QUERY_LOG_FLUSH_SIZE,
+        flush_interval: float = QUERY_LOG_FLUSH_INTERVAL,
+        spill_path: Path = QUERY_LOG_SPILL_PATH,
+        overflow_size: int = QUERY_LOG_OVERFLOW_SIZE,
+    ):
+
+        self.db = db
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.spill_path = Path(spill_path)
+        self.overflow_size = overflow_size
+
+        self._queue = asyncio.Queue(maxsize=max_size)
+        self._task = None
+        self._overflow = []
+
+        self.logged = 0
+        self.flushed = 0
+        self.spilled = 0
+        self.dropped = 0
+        self.flush_errors = 0
+        self.rollup_errors = 0
+
+    def log(self, question, answer, sources, confidence, prompt_tokens=None):
+
+        record = query_record(question, answer, sources, confidence, prompt_tokens)
+
+        try:
+            self._queue.put_nowait(record)
+            self.logged += 1
+
+        except asyncio.QueueFull:
+
+            if len(self._overflow) < self.overflow_size:
+                self._overflow.append(record)
+            else:
+                self.dropped += 1
+
+    def _spill(self, records):
+
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for r in records:
+                    f.write(json.dumps(r, default=str) + "\n")
+
+            self.spilled += len(records)
+
+        except OSError:
+            self.dropped += len(records)
+
+    async def _spill_async(self, records):
+        if records:
+            await asyncio.to_thread(self._spill, records)
+
+    async def _next_batch(self):
+        """
+        Wait for the first record, then collect until the batch is full
+        or the flush interval has passed. Also reports whether stop()
+        asked the flusher to finish.
+        """
+        first = await self._queue.get()
+
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = asyncio.get_running_loop().time() + self.flush_interval
+
+        while len(batch) < self.flush_size:
+
+            timeout = deadline - asyncio.get_running_loop().time()
+
+            if timeout <= 0:
+                break
+
+            try:
+                record = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+
+            if record is _STOP:
+                return batch, True
+
+            batch.append(record)
+
+        return batch, False
 
-    total_queries = query_logs_col.count_documents({})
+    async def _write(self, batch):
 
-    if total_queries == 0:
+        try:
+            await self.db[query_logs_col.name].insert_many(
+                [{**r, ROLLED_UP_FIELD: True} for r in batch],
+                ordered=False
+            )
+
+        except BulkWriteError as e:
+            # unordered insert: everything but the failed indexes is stored
+            failed = {err["index"] for err in e.details.get("writeErrors", [])}
+            print(f"⚠️ Query log flush partly failed, spilling {len(failed)} records")
+            self.flush_errors += 1
+            await self._spill_async([r for i, r in enumerate(batch) if i in failed])
+            batch = [r for i, r in enumerate(batch) if i not in failed]
+
+            if not batch:
+                return
+
+        except Exception as e:
+            print(f"⚠️ Query log flush failed ({e}), spilling {len(batch)} records")
+            self.flush_errors += 1
+            await self._spill_async(batch)
+            return
+
+        self.flushed += len(batch)
+
+        # logs are stored at this point; a failed rollup only skews the
+        # dashboard counters and must not spill (replay would duplicate)
+        try:
+            for name, ops in rollup_ops(batch).items():
+                await self.db[name].bulk_write(ops, ordered=False)
+
+        except Exception as e:
+            print(f"⚠️ Query rollup update failed ({e}) for {len(batch)} logged queries")
+            self.rollup_errors += 1
+
+    async def _run(self):
+
+        while True:
+
+            batch, stopping = await self._next_batch()
+
+            if batch:
+                await self._write(batch)
+
+            overflow, self._overflow = self._overflow, []
+            await self._spill_async(overflow)
+
+            if stopping:
+                return
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Let the flusher drain everything queued so far, then exit.
+        """
+        if self._task is None:
+            return
+
+        await self._queue.put(_STOP)
+        await self._task
+
+        self._task = None
+
+    def stats(self):
         return {
-            "total_queries": 0,
-            "avg_confidence": 0,
-            "top_questions": [],
-            "top_sources": []
+            "buffered": self._queue.qsize(),
+            "overflow": len(self._overflow),
+            "logged": self.logged,
+            "flushed": self.flushed,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+            "flush_errors": self.flush_errors,
+            "rollup_errors": self.rollup_errors
         }
 
-    # average confidence
-    pipeline = [
+
+query_log = QueryLogBuffer(async_db)
+
+
+# =========================================================
+# ANALYTICS
+# =========================================================
+
+TOP_N = 5
+
+
+# logs written by QueryLogBuffer carry this flag: they were counted in
+# the rollups by the same flush that inserted them
+ROLLED_UP_FIELD = "rolled_up"
+
+# document in query_rollups recording that the one-off backfill ran;
+# rollup documents it already counted into are tagged with the same name
+ROLLUP_BACKFILL_MARKER = "backfill_v1"
+BACKFILLED_FIELD = "backfilled"
+
+# a claim this old with done: False belongs to a run that died midway
+ROLLUP_BACKFILL_STALE_SECONDS = 3600
+
+# Mongo duplicate key error
+DUPLICATE_KEY = 11000
+
+
+def not_rolled_up():
+    return {"$match": {ROLLED_UP_FIELD: {"$exists": False}}}
+
+
+def question_counts_pipeline():
+    return [
+        not_rolled_up(),
+        {"$group": {"_id": "$question", "count": {"$sum": 1}}}
+    ]
+
+
+def source_counts_pipeline():
+    return [
+        not_rolled_up(),
+        {"$unwind": "$sources"},
+        {"$group": {"_id": "$sources", "count": {"$sum": 1}}}
+    ]
+
+
+def totals_pipeline():
+    return [
+        not_rolled_up(),
         {
             "$group": {
                 "_id": None,
-                "avg_conf": {"$avg": "$confidence"}
+                "total_queries": {"$sum": 1},
+                "confidence_sum": {"$sum": "$confidence"}
             }
         }
     ]
 
-    avg_result = list(query_logs_col.aggregate(pipeline))
-    avg_confidence = round(avg_result[0]["avg_conf"], 3)
 
-    # top questions
-    questions = [
-        q["question"]
-        for q in query_logs_col.find({}, {"question": 1})
+def claim_backfill(marker):
+    """
+    True when this process should run the backfill: first start, or a
+    previous run that never finished (crashed, or failed and released).
+    """
+    now = datetime.utcnow()
+
+    try:
+        rollup_col.insert_one({"_id": marker, "started_at": now, "done": False})
+        return True
+    except DuplicateKeyError:
+        pass
+
+    resumed = rollup_col.update_one(
+        {
+            "_id": marker,
+            "done": False,
+            "started_at": {"$lt": now - timedelta(seconds=ROLLUP_BACKFILL_STALE_SECONDS)}
+        },
+        {"$set": {"started_at": now}}
+    )
+
+    if resumed.modified_count:
+        print("📊 Resuming an interrupted analytics rollup backfill...")
+        return True
+
+    claim = rollup_col.find_one({"_id": marker})
+
+    if claim and not claim.get("done"):
+        print(
+            f"⚠️ Analytics rollup backfill started {claim['started_at']:%Y-%m-%d %H:%M} "
+            f"has not finished; retried once it is {ROLLUP_BACKFILL_STALE_SECONDS}s old"
+        )
+
+    return False
+
+
+def backfill_op(_id, inc, marker):
+    """
+    $inc a rollup document at most once per backfill: the tag is set in
+    the same atomic update and already tagged documents don't match
+    (the upsert then fails with a duplicate key, which is ignored).
+    """
+    return UpdateOne(
+        {"_id": _id, BACKFILLED_FIELD: {"$ne": marker}},
+        {"$inc": inc, "$set": {BACKFILLED_FIELD: marker}},
+        upsert=True
+    )
+
+
+def apply_backfill_ops(col, ops):
+
+    for start in range(0, len(ops), 1000):
+
+        batch = ops[start:start + 1000]
+
+        # a duplicate key is either an already counted document or a
+        # flush that created it meanwhile; one retry tells them apart
+        for _ in range(2):
+
+            try:
+                col.bulk_write(batch, ordered=False)
+                break
+
+            except BulkWriteError as e:
+
+                errors = e.details.get("writeErrors", [])
+
+                if any(err["code"] != DUPLICATE_KEY for err in errors):
+                    raise
+
+                batch = [batch[err["index"]] for err in errors]
+
+
+def backfill_query_rollups():
+    """
+    Fold query logs that predate the rollups (no rolled_up flag) into
+    the rollup collections, once per deployment.
+
+    New logs always carry the flag, and every rollup document is counted
+    into at most once (see backfill_op), so concurrent flushes are never
+    lost and a failed or interrupted run can simply be repeated. A
+    marker document makes sure a single process runs it at a time.
+    """
+    marker = ROLLUP_BACKFILL_MARKER
+
+    try:
+        if not claim_backfill(marker):
+            return False
+
+        totals = list(query_logs_col.aggregate(totals_pipeline()))
+        question_counts = list(query_logs_col.aggregate(question_counts_pipeline(), allowDiskUse=True))
+        source_counts = list(query_logs_col.aggregate(source_counts_pipeline(), allowDiskUse=True))
+
+        if totals and totals[0]["total_queries"]:
+
+            print(f"📊 Backfilling analytics rollups from {totals[0]['total_queries']} query logs...")
+
+            apply_backfill_ops(rollup_col, [
+                backfill_op(
+                    "totals",
+                    {
+                        "total_queries": totals[0]["total_queries"],
+                        "confidence_sum": totals[0]["confidence_sum"]
+                    },
+                    marker
+                )
+            ])
+
+            for col, counts in (
+                (question_counts_col, question_counts),
+                (source_counts_col, source_counts),
+            ):
+                apply_backfill_ops(col, [
+                    backfill_op(r["_id"], {"count": r["count"]}, marker)
+                    for r in counts
+                ])
+
+        rollup_col.update_one(
+            {"_id": marker},
+            {"$set": {"done": True, "finished_at": datetime.utcnow()}}
+        )
+
+    except PyMongoError as e:
+        # release the claim so the next start repeats the (idempotent) run
+        print(f"⚠️ Analytics rollup backfill failed: {e}")
+
+        try:
+            rollup_col.delete_one({"_id": marker, "done": False})
+        except PyMongoError:
+            pass
+
+        return False
+
+    return True
+
+
+def top_counts(col, limit: int = TOP_N):
+    return [
+        (r["_id"], r["count"])
+        for r in col.find().sort("count", -1).limit(limit)
     ]
 
-    top_questions = Counter(questions).most_common(5)
 
-    # top sources
-    sources = []
+def get_query_analytics():
+    """
+    Dashboard analytics read from the rollup collections, so the cost
+    does not grow with the number of logged queries.
+    """
+
+    totals = rollup_col.find_one({"_id": "totals"})
 
-    for doc in query_logs_col.find({}, {"sources": 1}):
-        sources.extend(doc.get("sources", []))
+    if not totals or not totals.get("total_queries"):
+        return {
+            "total_queries": 0,
+            "avg_confidence": 0,
+            "top_questions": [],
+            "top_sources": []
+        }
 
-    top_sources = Counter(sources).most_common(5)
+    total_queries = totals["total_queries"]
 
     return {
         "total_queries": total_queries,
-        "avg_confidence": avg_confidence,
-        "top_questions": top_questions,
-        "top_sources": top_sources
-    }
\ No newline at end of file
+        "avg_confidence": round(totals["confidence_sum"] / total_queries, 3),
+        "top_questions": top_counts(question_counts_col),
+        "top_sources": top_counts(source_counts_col)
+    }
@@ -0,0 +1,462 @@
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from app.db.vector_store import VectorStore
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+
+NUMPY_STORE_DIR = Path(os.getenv("NUMPY_STORE_DIR", "data/vectors"))
+
+# float16 halves memory and disk; scores are computed in float32
+NUMPY_DTYPE = os.getenv("NUMPY_DTYPE", "float32")
+
+# rows reserved up front; the matrix doubles when full
+INITIAL_CAPACITY = 1024
+
+# rows scored per matmul, bounds the float32 copy of a float16 matrix
+SEARCH_BLOCK_ROWS = 65536
+
+VECTORS_FILE = "vectors.npy"
+META_FILE = "points.sqlite3"
+
+
+# =========================================================
+# NUMPY BACKEND
+# =========================================================
+
+class NumpyStore(VectorStore):
+    """
+    In-process vector index: unit-normalized vectors in a memory-mapped
+    NumPy matrix (vectors.npy) and payloads in SQLite (points.sqlite3).
+
+    Search is one blocked matmul plus argpartition top-k, with the
+    source_file / file_type filters applied as boolean masks. Writers
+    bump a generation counter, so other processes (bulk ingest vs API)
+    reload their view on the next search.
+
+    Every write runs in one BEGIN IMMEDIATE transaction, which holds
+    SQLite's write lock on points.sqlite3 for its whole duration; that
+    lock is also what serializes row allocation and growing
+    vectors.npy between processes.
+    """
+
+    name = "numpy"
+
+    def __init__(self, path: Path = NUMPY_STORE_DIR, dtype: str = NUMPY_DTYPE):
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.dtype = np.dtype(dtype)
+
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(
+            str(self.path / META_FILE),
+            check_same_thread=False,
+            timeout=30,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            " id TEXT PRIMARY KEY,"
+            " row INTEGER NOT NULL UNIQUE,"
+            " source_file TEXT,"
+            " file_type TEXT,"
+            " payload TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_points_source ON points (source_file)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        # rows below the high-water mark freed by deletes, reused by upserts
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY)"
+        )
+        self._conn.commit()
+
+        self._matrix = None
+        self._view = None
+        self._generation = None
+
+    # ---------- metadata ----------
+
+    @contextmanager
+    def _write(self):
+        """
+        Thread lock + cross-process write lock for one write. Row counts,
+        free rows and the matrix file are read only after taking it.
+        """
+        with self._lock:
+
+            self._conn.execute("BEGIN IMMEDIATE")
+
+            try:
+                # another process may have grown (replaced) the file
+                self._matrix = None
+                yield
+
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+            self._conn.commit()
+
+    def _meta(self, key, default=None):
+
+        # the connection is shared with ingest threads mid-transaction
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, str(value)),
+        )
+
+    def _bump_generation(self):
+        self._set_meta("generation", int(self._meta("generation", 0)) + 1)
+
+    # ---------- matrix ----------
+
+    def _open_matrix(self):
+
+        file = self.path / VECTORS_FILE
+
+        if self._matrix is None and file.exists():
+            self._matrix = np.load(file, mmap_mode="r+")
+
+        return self._matrix
+
+    def _grow(self, rows_needed: int, dim: int):
+        """
+        Make room for rows_needed rows, doubling the file when full.
+        """
+        matrix = self._open_matrix()
+
+        if matrix is not None and matrix.shape[0] >= rows_needed:
+            return matrix
+
+        capacity = max(INITIAL_CAPACITY, rows_needed)
+
+        if matrix is not None:
+            capacity = max(capacity, matrix.shape[0] * 2)
+
+        tmp = self.path / (VECTORS_FILE + ".tmp")
+
+        grown = np.lib.format.open_memmap(
+            tmp, mode="w+", dtype=self.dtype, shape=(capacity, dim)
+        )
+
+        if matrix is not None:
+            grown[:matrix.shape[0]] = matrix
+
+        grown.flush()
+        del grown
+
+        self._matrix = None
+        os.replace(tmp, self.path / VECTORS_FILE)
+
+        return self._open_matrix()
+
+    # ---------- writes (ingest) ----------
+
+    def exists(self):
+        return self._meta("dim") is not None
+
+    def ensure(self, vector_size: int):
+
+        with self._write():
+
+            dim = self._meta("dim")
+
+            if dim is None:
+                print(f"🗄 Creating NumPy vector index in {self.path}...")
+                self._set_meta("dim", vector_size)
+                self._set_meta("rows", 0)
+                self._bump_generation()
+                self._grow(INITIAL_CAPACITY, vector_size)
+
+            elif int(dim) != vector_size:
+                raise ValueError(
+                    f"Vector index has dimension {dim}, got {vector_size}"
+                )
+
+    def upsert(self, points):
+
+        if not points:
+            return
+
+        with self._write():
+
+            dim = int(self._meta("dim"))
+            high_water = int(self._meta("rows", 0))
+
+            ids = [str(p.id) for p in points]
+            rows_by_id = self._rows_for(ids)
+
+            new = len({pid for pid in ids if pid not in rows_by_id})
+            free = self._take_free_rows(new)
+            rows = []
+
+            for pid in ids:
+
+                if pid in rows_by_id:
+                    rows.append(rows_by_id[pid])
+                elif free:
+                    rows.append(free.pop())
+                else:
+                    rows.append(high_water)
+                    high_water += 1
+
+                rows_by_id[pid] = rows[-1]
+
+            vectors = np.asarray([p.vector for p in points], dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.clip(norms, 1e-12, None)
+
+            matrix = self._grow(high_water, dim)
+            matrix[rows] = vectors.astype(self.dtype)
+            matrix.flush()
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO points (id, row, source_file, file_type, payload) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        pid,
+                        row,
+                        (p.payload or {}).get("metadata", {}).get("source_file"),
+                        (p.payload or {}).get("metadata", {}).get("file_type"),
+                        json.dumps(p.payload or {}),
+                    )
+                    for pid, row, p in zip(ids, rows, points)
+                ],
+            )
+
+            self._set_meta("rows", high_water)
+            self._bump_generation()
+
+    def _rows_for(self, ids):
+
+        found = {}
+
+        for start in range(0, len(ids), 500):
+
+            batch = ids[start:start + 500]
+            marks = ",".join("?" * len(batch))
+
+            found.update(self._conn.execute(
+                f"SELECT id, row FROM points WHERE id IN ({marks})", batch
+            ).fetchall())
+
+        return found
+
+    def _take_free_rows(self, limit: int):
+        """
+        Claim up to limit rows freed by deletes (lowest first).
+        """
+        if limit == 0:
+            return []
+
+        rows = [
+            row for (row,) in self._conn.execute(
+                "SELECT row FROM free_rows ORDER BY row LIMIT ?", (limit,)
+            )
+        ]
+
+        self._conn.executemany("DELETE FROM free_rows WHERE row = ?", [(r,) for r in rows])
+
+        return rows[::-1]
+
+    def chunk_ids(self, source_file: str):
+
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT id, json_extract(payload, '$.metadata.chunk_id') "
+                "FROM points WHERE source_file = ?",
+                (source_file,),
+            ))
+
+    def set_metadata(self, updates):
+
+        with self._write():
+
+            # payloads are read from SQLite at search time, no reload needed
+            self._conn.executemany(
+                "UPDATE points SET payload = json_set(payload, '$.metadata', json(?)) "
+                "WHERE id = ?",
+                [(json.dumps(metadata), str(pid)) for pid, metadata in updates.items()],
+            )
+
+    def delete(self, point_ids):
+
+        ids = [(str(pid),) for pid in point_ids]
+
+        with self._write():
+
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO free_rows (row) SELECT row FROM points WHERE id = ?", ids
+            )
+            self._conn.executemany("DELETE FROM points WHERE id = ?", ids)
+            self._bump_generation()
+
+    def drop(self):
+
+        with self._write():
+
+            if self.exists():
+                print("🗑 Rebuild requested, dropping NumPy vector index...")
+
+            self._conn.execute("DELETE FROM points")
+            self._conn.execute("DELETE FROM free_rows")
+
+            # the generation keeps counting so other processes notice
+            self._conn.execute("DELETE FROM meta WHERE key IN ('dim', 'rows')")
+            self._bump_generation()
+
+            self._view = None
+            self._generation = None
+
+            (self.path / VECTORS_FILE).unlink(missing_ok=True)
+
+    # ---------- reads (API) ----------
+
+    def _load_view(self):
+        """
+        Row-aligned arrays for search, rebuilt when the generation moves.
+        """
+        generation = self._meta("generation")
+
+        if self._view is not None and generation == self._generation:
+            return self._view
+
+        # one read transaction, so rows, high-water mark and generation agree
+        self._conn.execute("BEGIN")
+
+        try:
+            generation = self._meta("generation")
+            high_water = int(self._meta("rows", 0))
+
+            rows = self._conn.execute(
+                "SELECT row, id, source_file, file_type FROM points ORDER BY row"
+            ).fetchall()
+
+        finally:
+            self._conn.commit()
+
+        live = np.zeros(high_water, dtype=bool)
+        ids = np.empty(high_water, dtype=object)
+        sources = np.empty(high_water, dtype=object)
+        types = np.empty(high_water, dtype=object)
+
+        for row, pid, source_file, file_type in rows:
+            live[row] = True
+            ids[row] = pid
+            sources[row] = source_file
+            types[row] = file_type
+
+        # other processes may have grown or replaced the file
+        self._matrix = None
+        matrix = self._open_matrix()
+
+        self._view = {
+            "matrix": matrix[:high_water] if matrix is not None else None,
+            "live": live,
+            "ids": ids,
+            "source_file": sources,
+            "file_type": types
+        }
+        self._generation = generation
+
+        return self._view
+
+    def search(self, vector, k: int, filters=None):
+
+        # only the view snapshot needs the lock; views are never mutated,
+        # so concurrent queries score in parallel (numpy releases the GIL)
+        with self._lock:
+
+            if not self.exists():
+                return []
+
+            view = self._load_view()
+
+        if view["matrix"] is None or not view["live"].any():
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        matrix = view["matrix"]
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+
+        for start in range(0, matrix.shape[0], SEARCH_BLOCK_ROWS):
+            block = matrix[start:start + SEARCH_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ query
+
+        mask = view["live"].copy()
+
+        for field, value in (filters or {}).items():
+            if value is not None:
+                mask &= view[field] == value
+
+        candidates = np.flatnonzero(mask)
+
+        if len(candidates) == 0:
+            return []
+
+        k = min(k, len(candidates))
+        candidate_scores = scores[candidates]
+
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top])]
+
+        rows = candidates[top]
+        ids = [view["ids"][r] for r in rows]
+
+        with self._lock:
+            payloads = self._payloads(ids)
+
+        # a point deleted since the snapshot has no payload any more
+        return [
+            (pid, float(scores[r]), payloads[pid])
+            for pid, r in zip(ids, rows)
+            if pid in payloads
+        ]
+
+    def _payloads(self, ids):
+
+        marks = ",".join("?" * len(ids))
+
+        return {
+            pid: json.loads(payload)
+            for pid, payload in self._conn.execute(
+                f"SELECT id, payload FROM points WHERE id IN ({marks})", ids
+            )
+        }
+
+    def sample(self, limit: int):
+
+        with self._lock:
+            return [
+                (pid, json.loads(payload))
+                for pid, payload in self._conn.execute(
+                    "SELECT id, payload FROM points ORDER BY row LIMIT ?", (limit,)
+                )
+            ]
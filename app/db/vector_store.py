@@ -0,0 +1,430 @@
+from abc import ABC, abstractmethod
+import asyncio
+import os
+import threading
+
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+
+# "qdrant" (server) or "numpy" (in-process memory-mapped index)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")
+
+QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+COLLECTION_NAME = "hr_knowledge_base"
+
+# keyword payload indexes used by filtered retrieval and re-ingest scrolls
+PAYLOAD_INDEX_FIELDS = ("metadata.source_file", "metadata.file_type")
+
+# collection layout, applied when the collection is created
+# (use --rebuild to change an existing one); see benchmarks/bench_qdrant.py
+HNSW_M = 16
+HNSW_EF_CONSTRUCT = 100
+
+# None (float32 only) or "int8" (scalar quantization kept in RAM,
+# originals used for rescoring)
+QUANTIZATION = None
+QUANTIZATION_QUANTILE = 0.99
+
+# keep original vectors / payloads on disk instead of RAM
+VECTORS_ON_DISK = False
+PAYLOAD_ON_DISK = False
+
+# payload updates sent per request (chunk_id refresh on re-ingest)
+UPDATE_BATCH_SIZE = 256
+
+# search-time HNSW beam width (None = Qdrant default, ef_construct)
+SEARCH_HNSW_EF = None
+
+# with int8 quantization: re-rank oversampled candidates on the
+# original vectors (ignored for float-only collections)
+QUANTIZATION_RESCORE = True
+QUANTIZATION_OVERSAMPLING = 2.0
+
+
+# =========================================================
+# BACKEND INTERFACE
+# =========================================================
+
+class VectorStore(ABC):
+    """
+    What ingestion and retrieval need from a vector backend.
+
+    Points are PointStruct-like (id, vector, payload); payloads use the
+    nested {"page_content", "metadata"} layout. filters is a plain
+    {"source_file": ..., "file_type": ...} dict matched on metadata.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def exists(self):
+        ...
+
+    @abstractmethod
+    def ensure(self, vector_size: int):
+        """
+        Create the collection / index if it does not exist yet.
+        """
+
+    def ensure_payload_indexes(self):
+        """
+        Index the filterable metadata fields of an existing collection.
+        Backends that filter without payload indexes have nothing to do.
+        """
+
+    @abstractmethod
+    def upsert(self, points):
+        ...
+
+    @abstractmethod
+    def chunk_ids(self, source_file: str):
+        """
+        {point id: chunk_id} of every point currently stored for a source file.
+        """
+
+    @abstractmethod
+    def set_metadata(self, updates):
+        """
+        Replace the payload metadata of existing points: {point id: metadata}.
+        """
+
+    @abstractmethod
+    def delete(self, point_ids):
+        ...
+
+    @abstractmethod
+    def drop(self):
+        ...
+
+    @abstractmethod
+    def search(self, vector, k: int, filters=None):
+        """
+        Top-k [(id, cosine score, payload)], best first.
+        """
+
+    @abstractmethod
+    def sample(self, limit: int):
+        """
+        A few [(id, payload)] for debugging.
+        """
+
+    # async variants for the API; backends with a native async client
+    # override these, in-process ones run in a worker thread
+
+    async def aexists(self):
+        return await asyncio.to_thread(self.exists)
+
+    async def asearch(self, vector, k: int, filters=None):
+        return await asyncio.to_thread(self.search, vector, k, filters)
+
+    async def asample(self, limit: int):
+        return await asyncio.to_thread(self.sample, limit)
+
+
+# =========================================================
+# QDRANT HELPERS
+# =========================================================
+
+def source_filter(source_file: str):
+    return metadata_filter({"source_file": source_file})
+
+
+def metadata_filter(filters):
+    """
+    {"source_file": ..., "file_type": ...} -> Qdrant filter on the
+    indexed metadata fields (None values are ignored).
+    """
+    conditions = [
+        models.FieldCondition(
+            key=f"metadata.{field}",
+            match=models.MatchValue(value=value),
+        )
+        for field, value in (filters or {}).items()
+        if value is not None
+    ]
+
+    return models.Filter(must=conditions) if conditions else None
+
+
+def search_params(
+    hnsw_ef: int = SEARCH_HNSW_EF,
+    rescore: bool = QUANTIZATION_RESCORE,
+    oversampling: float = QUANTIZATION_OVERSAMPLING,
+):
+    return models.SearchParams(
+        hnsw_ef=hnsw_ef,
+        quantization=models.QuantizationSearchParams(
+            rescore=rescore,
+            oversampling=oversampling,
+        ),
+    )
+
+
+def collection_config(
+    vector_size: int,
+    quantization: str = QUANTIZATION,
+    m: int = HNSW_M,
+    ef_construct: int = HNSW_EF_CONSTRUCT,
+    vectors_on_disk: bool = VECTORS_ON_DISK,
+    payload_on_disk: bool = PAYLOAD_ON_DISK,
+):
+    """
+    create_collection() keyword arguments for a collection layout.
+    """
+    if quantization not in (None, "int8"):
+        raise ValueError(f"Unknown quantization: {quantization}")
+
+    quantization_config = None
+
+    if quantization == "int8":
+        quantization_config = models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=QUANTIZATION_QUANTILE,
+                always_ram=True,
+            )
+        )
+
+    return {
+        "vectors_config": models.VectorParams(
+            size=vector_size,
+            distance=models.Distance.COSINE,
+            on_disk=vectors_on_disk,
+        ),
+        "hnsw_config": models.HnswConfigDiff(
+            m=m,
+            ef_construct=ef_construct,
+        ),
+        "quantization_config": quantization_config,
+        "on_disk_payload": payload_on_disk,
+    }
+
+
+# =========================================================
+# QDRANT BACKEND
+# =========================================================
+
+class QdrantStore(VectorStore):
+    """
+    Qdrant server: sync client for ingestion, async client for the API.
+    """
+
+    name = "qdrant"
+
+    def __init__(self, url: str = QDRANT_URL, collection_name: str = COLLECTION_NAME):
+
+        self.url = url
+        self.collection_name = collection_name
+
+        self._client = None
+        self._async_client = None
+
+        # concurrent first ingests must not both create the collection
+        self._ensure_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = QdrantClient(self.url)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = AsyncQdrantClient(self.url)
+        return self._async_client
+
+    def exists(self):
+        return self.client.collection_exists(self.collection_name)
+
+    def ensure(self, vector_size: int):
+
+        with self._ensure_lock:
+
+            if not self.exists():
+
+                print("🗄 Creating collection...")
+
+                try:
+                    self.client.create_collection(
+                        collection_name=self.collection_name,
+                        **collection_config(vector_size),
+                    )
+
+                except Exception:
+                    # created meanwhile by another process (bulk ingest)
+                    if not self.exists():
+                        raise
+
+            self.ensure_payload_indexes()
+
+    def ensure_payload_indexes(self):
+        """
+        Keyword indexes for the fields /ask, /search and /generate-email
+        can filter on, so filtered HNSW search stays fast.
+        """
+        indexed = self.client.get_collection(self.collection_name).payload_schema or {}
+
+        for field in PAYLOAD_INDEX_FIELDS:
+
+            if field in indexed:
+                continue
+
+            print(f"🗂 Creating payload index on {field}...")
+
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field,
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+
+    def upsert(self, points):
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=points,
+            wait=True,
+        )
+
+    def chunk_ids(self, source_file: str):
+
+        if not self.exists():
+            return {}
+
+        ids = {}
+        offset = None
+
+        while True:
+
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=source_filter(source_file),
+                limit=1000,
+                offset=offset,
+                with_payload=["metadata.chunk_id"],
+                with_vectors=False,
+            )
+
+            for r in records:
+                ids[str(r.id)] = (r.payload or {}).get("metadata", {}).get("chunk_id")
+
+            if offset is None:
+                return ids
+
+    def set_metadata(self, updates):
+
+        updates = list(updates.items())
+
+        # one request per batch; each point gets its own metadata
+        for start in range(0, len(updates), UPDATE_BATCH_SIZE):
+            self.client.batch_update_points(
+                collection_name=self.collection_name,
+                update_operations=[
+                    models.SetPayloadOperation(
+                        set_payload=models.SetPayload(
+                            payload={"metadata": metadata},
+                            points=[point_id],
+                        )
+                    )
+                    for point_id, metadata in updates[start:start + UPDATE_BATCH_SIZE]
+                ],
+            )
+
+    def delete(self, point_ids):
+
+        point_ids = list(point_ids)
+
+        if point_ids:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.PointIdsList(points=point_ids),
+            )
+
+    def drop(self):
+
+        if self.exists():
+            print("🗑 Rebuild requested, dropping collection...")
+            self.client.delete_collection(self.collection_name)
+
+    def search(self, vector, k: int, filters=None):
+
+        points = self.client.search(
+            collection_name=self.collection_name,
+            query_vector=vector,
+            query_filter=metadata_filter(filters),
+            search_params=search_params(),
+            limit=k,
+            with_payload=True,
+        )
+
+        return [(str(p.id), p.score, p.payload) for p in points]
+
+    def sample(self, limit: int):
+
+        records, _ = self.client.scroll(
+            collection_name=self.collection_name,
+            limit=limit,
+            with_payload=True,
+            with_vectors=False,
+        )
+
+        return [(str(r.id), r.payload) for r in records]
+
+    async def aexists(self):
+        return await self.async_client.collection_exists(self.collection_name)
+
+    async def asearch(self, vector, k: int, filters=None):
+
+        points = await self.async_client.search(
+            collection_name=self.collection_name,
+            query_vector=vector,
+            query_filter=metadata_filter(filters),
+            search_params=search_params(),
+            limit=k,
+            with_payload=True,
+        )
+
+        return [(str(p.id), p.score, p.payload) for p in points]
+
+    async def asample(self, limit: int):
+
+        records, _ = await self.async_client.scroll(
+            collection_name=self.collection_name,
+            limit=limit,
+            with_payload=True,
+            with_vectors=False,
+        )
+
+        return [(str(r.id), r.payload) for r in records]
+
+
+# =========================================================
+# FACTORY
+# =========================================================
+
+_stores = {}
+
+
+def get_vector_store(backend: str = None):
+    """
+    Process-wide vector store for the configured backend.
+    Pick it with VECTOR_BACKEND.
+    """
+    backend = backend or VECTOR_BACKEND
+
+    if backend not in _stores:
+
+        if backend == "qdrant":
+            _stores[backend] = QdrantStore()
+
+        elif backend == "numpy":
+            from app.db.numpy_store import NumpyStore
+            _stores[backend] = NumpyStore()
+
+        else:
+            raise ValueError(f"Unknown vector backend: {backend} (expected qdrant or numpy)")
+
+    return _stores[backend]
@@ -0,0 +1,216 @@
+from pathlib import Path
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+
+CACHE_PATH = Path("data/cache/embeddings.sqlite3")
+
+# total size of stored vectors before least-recently-used rows are evicted
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+# SQLite limits the number of "?" parameters per statement
+LOOKUP_BATCH = 500
+
+
+# =========================================================
+# KEYS
+# =========================================================
+
+def normalize_text(text: str):
+    """
+    Collapse whitespace so re-extracted text hashes the same.
+    """
+    return " ".join(text.split())
+
+
+def text_hash(text: str):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+# =========================================================
+# SQLITE STORE
+# =========================================================
+
+class EmbeddingCache:
+    """
+    On-disk cache of float32 vectors keyed by (model name, text hash).
+    """
+
+    def __init__(self, path: Path = CACHE_PATH, max_bytes: int = MAX_CACHE_BYTES):
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes):
+        """
+        Return {text_hash: vector} for the hashes present in the cache.
+        """
+        found = {}
+
+        with self._lock:
+
+            for start in range(0, len(hashes), LOOKUP_BATCH):
+
+                batch = hashes[start:start + LOOKUP_BATCH]
+                marks = ",".join("?" * len(batch))
+
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({marks})",
+                    [model, *batch],
+                ).fetchall()
+
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? "
+                    "WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+
+        return found
+
+    def put_many(self, model: str, hashes, vectors):
+
+        now = time.time()
+        rows = []
+
+        for h, vec in zip(hashes, vectors):
+            blob = np.asarray(vec, dtype=np.float32).tobytes()
+            rows.append((model, h, blob, len(blob), now))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(model, text_hash, vector, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """
+        Drop least-recently-used vectors until the cache fits max_bytes.
+        """
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+
+        for model, h, size in self._conn.execute(
+            "SELECT model, text_hash, size FROM embeddings ORDER BY last_used"
+        ):
+            victims.append((model, h))
+            freed += size
+            if freed >= excess:
+                break
+
+        self._conn.executemany(
+            "DELETE FROM embeddings WHERE model = ? AND text_hash = ?",
+            victims,
+        )
+
+        print(f"🧹 Embedding cache evicted {len(victims)} vectors")
+
+
+# =========================================================
+# EMBEDDINGS WRAPPER
+# =========================================================
+
+_shared_cache = None
+
+
+def get_embedding_cache():
+    """
+    Process-wide cache instance shared by both ingest paths.
+    """
+    global _shared_cache
+
+    if _shared_cache is None:
+        _shared_cache = EmbeddingCache()
+
+    return _shared_cache
+
+
+class CachedEmbeddings:
+    """
+    Drop-in wrapper around an embeddings model whose embed_documents
+    only runs the model on texts missing from the cache.
+    """
+
+    def __init__(self, embeddings, cache: EmbeddingCache = None, model_name: str = None):
+
+        self.embeddings = embeddings
+        self.cache = cache or get_embedding_cache()
+        self.model_name = model_name or getattr(embeddings, "model_name", "unknown")
+
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts):
+
+        hashes = [text_hash(t) for t in texts]
+        cached = self.cache.get_many(self.model_name, list(set(hashes)))
+
+        missing = {}
+        for t, h in zip(texts, hashes):
+            if h not in cached and h not in missing:
+                missing[h] = t
+
+        miss_count = sum(1 for h in hashes if h not in cached)
+
+        self.hits += len(texts) - miss_count
+        self.misses += miss_count
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            self.cache.put_many(self.model_name, list(missing.keys()), vectors)
+            cached.update(zip(missing.keys(), vectors))
+
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+    def stats(self):
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses
+        }
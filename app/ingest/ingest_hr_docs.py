@@ -1,6 +1,10 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
 from pathlib import Path
 from typing import List
-import uuid
+import argparse
+import multiprocessing
+import time
 
 from langchain_community.document_loaders import (
     PyPDFLoader,
@@ -8,13 +12,16 @@ from langchain_community.document_loaders import (
     UnstructuredMarkdownLoader,
 )
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-from langchain_community.embeddings import HuggingFaceEmbeddings
 
-from qdrant_client import QdrantClient, models
-
-from app.db.mongo import store_doc_metadata
+from app.db.mongo import clear_doc_metadata, ensure_indexes
+from app.db.vector_store import get_vector_store
+from app.rag.lexical import get_lexical_index
+from app.ingest.pipeline import (
+    UPSERT_BATCH_SIZE,
+    UPSERT_PARALLEL,
+    stream_ingest,
+)
 
 
 # -------------------------
@@ -22,10 +29,10 @@ from app.db.mongo import store_doc_metadata
 # -------------------------
 
 DATA_DIR = Path("data/hr_docs")
-COLLECTION_NAME = "hr_knowledge_base"
 
-CHUNK_SIZE = 700
-CHUNK_OVERLAP = 100
+# parse workers are started from the pipeline's page thread, after the
+# embedding model is loaded; forking there can deadlock, so spawn them
+LOADER_START_METHOD = "spawn"
 
 
 # -------------------------
@@ -62,107 +69,139 @@ def load_file(path: Path) -> List[Document]:
 # LOAD ALL DOCUMENTS
 # -------------------------
 
-def load_all_documents() -> List[Document]:
-    all_docs = []
+def load_file_timed(path: Path):
+    """
+    Worker entry point: never raises, so one bad file can't kill the pool.
+    """
+    start = time.perf_counter()
 
-    for path in DATA_DIR.glob("**/*"):
-        if path.is_file():
-            all_docs.extend(load_file(path))
+    try:
+        docs = load_file(path)
+        error = None
 
-    print(f"✅ Loaded {len(all_docs)} raw documents/pages")
-    return all_docs
+    except Exception as e:
+        docs = []
+        error = f"{type(e).__name__}: {e}"
 
+    return path, docs, time.perf_counter() - start, error
 
-# -------------------------
-# CHUNKING
-# -------------------------
 
-def split_documents(docs: List[Document]) -> List[Document]:
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        separators=[
-            "\n\n",
-            "\n",
-            ". ",
-            " ",
-        ],
-    )
+def iter_loaded_files(workers: int = 1):
+    """
+    Yield (path, docs, seconds, error) per file, as soon as each finishes.
+    With workers > 1 files are parsed in a process pool.
+    """
+    paths = sorted(p for p in DATA_DIR.glob("**/*") if p.is_file())
+
+    if workers <= 1:
+        for path in paths:
+            yield load_file_timed(path)
+        return
+
+    pending_paths = iter(paths)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(LOADER_START_METHOD),
+    ) as pool:
+
+        # sliding window: parsed-but-unconsumed files stay bounded
+        futures = {
+            pool.submit(load_file_timed, p): p
+            for p in islice(pending_paths, workers * 2)
+        }
+
+        while futures:
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+            for future in done:
+
+                path = futures.pop(future)
+
+                try:
+                    yield future.result()
+
+                except Exception as e:
+                    yield path, [], 0.0, f"{type(e).__name__}: {e}"
+
+                for p in islice(pending_paths, 1):
+                    futures[pool.submit(load_file_timed, p)] = p
+
 
-    chunks = splitter.split_documents(docs)
+def print_timing_summary(timings):
 
-    print(f"✅ Created {len(chunks)} chunks")
-    return chunks
+    print("\n⏱ Per-file parse times:")
+
+    for name, pages, seconds, error in sorted(timings, key=lambda t: -t[2]):
+        status = f"❌ {error}" if error else f"{pages} pages"
+        print(f"   {seconds:7.2f}s  {name}  ({status})")
+
+    failed = sum(1 for t in timings if t[3])
+    total = sum(t[2] for t in timings)
+
+    print(f"   {len(timings)} files, {failed} failed, {total:.2f}s total parse time\n")
 
 
 # -------------------------
-# QDRANT STORE + MONGO META
+# VECTOR STORE + MONGO META
 # -------------------------
 
-def store_in_qdrant(chunks):
+def drop_collection():
 
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
-    )
+    get_vector_store().drop()
 
-    client = QdrantClient("http://localhost:6333")
+    # the BM25 index and Mongo chunk metadata mirror the collection;
+    # rows of files no longer on disk would otherwise stay forever
+    get_lexical_index().clear()
+    clear_doc_metadata()
 
-    print("📐 Creating embeddings...")
 
-    vectors = embeddings.embed_documents(
-        [doc.page_content for doc in chunks]
-    )
+def report(stats):
 
-    print("🗄 Recreating collection...")
+    print(
+        f"✅ Stored embeddings in vector store + Mongo "
+        f"({stats['vectors']} upserted, {stats['skipped']} unchanged, "
+        f"{stats['deleted']} removed, {stats['points_per_sec']} points/sec)"
+    )
 
-    client.recreate_collection(
-        collection_name=COLLECTION_NAME,
-        vectors_config=models.VectorParams(
-            size=len(vectors[0]),
-            distance=models.Distance.COSINE,
-        ),
+    print(
+        f"🧠 Embedding cache: {stats['cache_hits']} hits, "
+        f"{stats['cache_misses']} misses"
     )
 
-    print("⬆️ Uploading vectors...")
 
-    points = []
+def ingest_directory(
+    workers: int = 1,
+    rebuild: bool = False,
+    batch_size: int = UPSERT_BATCH_SIZE,
+    parallel: int = UPSERT_PARALLEL,
+):
+    """
+    Stream every file under DATA_DIR through load -> split -> embed -> upsert
+    without materializing the corpus.
+    """
 
-    for i, (vec, doc) in enumerate(zip(vectors, chunks)):
+    if rebuild:
+        drop_collection()
 
-        doc_id = str(uuid.uuid4())
+    timings = []
 
-        # ✅ NESTED PAYLOAD (CORRECT)
-        payload = {
-            "page_content": doc.page_content,
-            "metadata": {
-                "source_file": doc.metadata.get("source_file", "unknown"),
-                "file_type": doc.metadata.get("file_type", "unknown"),
-                "chunk_id": i
-            }
-        }
+    def pages():
+        for path, docs, seconds, error in iter_loaded_files(workers):
+            timings.append((path.name, len(docs), seconds, error))
+            yield from docs
 
-        points.append(
-            models.PointStruct(
-                id=doc_id,
-                vector=vec,
-                payload=payload
-            )
-        )
-
-        # ---- Mongo metadata ----
-        store_doc_metadata(
-            doc_id=doc_id,
-            source_file=doc.metadata.get("source_file"),
-            chunk_id=i,
-            metadata=payload["metadata"]  # ✅ Pass the metadata dict
-        )
-
-    client.upsert(
-        collection_name=COLLECTION_NAME,
-        points=points,
+    stats = stream_ingest(
+        pages(),
+        batch_size=batch_size,
+        parallel=parallel,
     )
 
-    print("✅ Stored embeddings in Qdrant + Mongo")
+    print_timing_summary(timings)
+    report(stats)
+
+    return stats
 
 
 
@@ -171,11 +210,42 @@ def store_in_qdrant(chunks):
 # -------------------------
 
 if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Bulk HR document ingestion")
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="drop the collection and re-embed everything",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="parse files in N parallel processes",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=UPSERT_BATCH_SIZE,
+        help="points per vector-store upsert request",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=UPSERT_PARALLEL,
+        help="upsert batches in flight at once",
+    )
+    args = parser.parse_args()
+
     print("\n📥 HR Document Ingestion Started...\n")
 
-    docs = load_all_documents()
-    chunks = split_documents(docs)
-    store_in_qdrant(chunks)
+    ensure_indexes()
 
-    print("\n🎉 Ingestion complete.\n")
+    ingest_directory(
+        workers=args.workers,
+        rebuild=args.rebuild,
+        batch_size=args.batch_size,
+        parallel=args.parallel,
+    )
 
+    print("\n🎉 Ingestion complete.\n")
@@ -0,0 +1,180 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+import threading
+import traceback
+import uuid
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+
+INGEST_WORKERS = 2
+
+# finished jobs kept around for /jobs/{id}
+MAX_JOBS_KEPT = 200
+
+
+# =========================================================
+# IN-PROCESS INGEST JOB QUEUE
+# =========================================================
+
+class IngestJobQueue:
+    """
+    Runs ingest_file in a local thread pool and tracks per-job progress.
+
+    Jobs for the same source file run one after another (a re-upload
+    waits for the previous ingest of that file); different files run
+    in parallel.
+
+    No external broker: jobs live in this process and are lost on restart.
+    """
+
+    def __init__(self, ingest, workers: int = INGEST_WORKERS):
+
+        self.ingest = ingest
+        self.pool = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="ingest",
+        )
+
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+        # source_file -> jobs waiting behind the running one
+        self._waiting = {}
+
+    def submit(self, path: Path, source_file: str = None):
+
+        job_id = uuid.uuid4().hex
+        source_file = source_file or path.name
+
+        job = {
+            "id": job_id,
+            "file": source_file,
+            "status": "queued",
+            "stage": "queued",
+            "progress": {
+                "pages_parsed": 0,
+                "chunks_total": 0,
+                "chunks_embedded": 0,
+                "chunks_skipped": 0,
+                "points_upserted": 0
+            },
+            "stats": None,
+            "error": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "finished_at": None
+        }
+
+        with self._lock:
+
+            self._jobs[job_id] = job
+            self._trim()
+
+            if source_file in self._waiting:
+                self._waiting[source_file].append((job_id, path))
+                return job_id
+
+            self._waiting[source_file] = deque()
+
+        self.pool.submit(self._run, job_id, path, source_file)
+
+        return job_id
+
+    def get(self, job_id: str):
+
+        with self._lock:
+
+            job = self._jobs.get(job_id)
+
+            if job is None:
+                return None
+
+            return {**job, "progress": dict(job["progress"])}
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _progress(self, job_id):
+
+        def report(stage, **counts):
+            with self._lock:
+                job = self._jobs[job_id]
+                job["stage"] = stage
+                for key, value in counts.items():
+                    job["progress"][key] = job["progress"].get(key, 0) + value
+
+        return report
+
+    def _run(self, job_id, path: Path, source_file: str):
+
+        try:
+            self._ingest(job_id, path, source_file)
+
+        finally:
+            self._next(source_file)
+
+    def _next(self, source_file: str):
+        """
+        Start the next waiting job for source_file, if any.
+        """
+        with self._lock:
+
+            waiting = self._waiting[source_file]
+
+            if not waiting:
+                del self._waiting[source_file]
+                return
+
+            job_id, path = waiting.popleft()
+
+        self.pool.submit(self._run, job_id, path, source_file)
+
+    def _ingest(self, job_id, path: Path, source_file: str):
+
+        self._update(job_id, status="running")
+
+        try:
+            stats = self.ingest(
+                path,
+                progress=self._progress(job_id),
+                source_file=source_file
+            )
+
+        except Exception as e:
+            traceback.print_exc()
+            self._update(
+                job_id,
+                status="failed",
+                stage="failed",
+                error=str(e),
+                finished_at=datetime.utcnow().isoformat()
+            )
+            return
+
+        self._update(
+            job_id,
+            status="done",
+            stage="done",
+            stats=stats,
+            finished_at=datetime.utcnow().isoformat()
+        )
+
+    def _trim(self):
+        """
+        Forget the oldest finished jobs beyond MAX_JOBS_KEPT.
+        """
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in ("done", "failed")
+        ]
+
+        for job_id in finished[:max(0, len(self._jobs) - MAX_JOBS_KEPT)]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
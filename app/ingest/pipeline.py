@@ -1,4 +1,10 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
 from pathlib import Path
+import hashlib
+import queue
+import threading
+import time
 import uuid
 
 from langchain_community.document_loaders import (
@@ -8,65 +14,90 @@ from langchain_community.document_loaders import (
 )
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 
-from qdrant_client import QdrantClient, models
+from qdrant_client import models
 
-from app.db.mongo import store_doc_metadata
+from app.db.mongo import delete_doc_metadata, store_doc_metadata_bulk, update_doc_metadata
+from app.db.vector_store import VectorStore, get_vector_store
+from app.ingest.embedding_cache import CachedEmbeddings
+from app.rag.embeddings import get_embedding_model
+from app.rag.kb_state import bump_kb_version
+from app.rag.keywords import chunk_keywords
+from app.rag.lexical import get_lexical_index
 
 
 # =========================================================
 # CONFIG
 # =========================================================
 
-QDRANT_URL = "http://localhost:6333"
-COLLECTION_NAME = "hr_knowledge_base"
-
 CHUNK_SIZE = 700
 CHUNK_OVERLAP = 100
 
+# streaming pipeline
+EMBED_BATCH_SIZE = 64
+STAGE_QUEUE_SIZE = 8
+
+# batched upload stage
+UPSERT_BATCH_SIZE = 256
+UPSERT_PARALLEL = 4
+UPSERT_RETRIES = 3
+
 
 # =========================================================
 # LOAD FILE
 # =========================================================
 
-def load_file(path: Path):
+def make_loader(path: Path):
 
     suffix = path.suffix.lower()
 
     if suffix == ".pdf":
-        loader = PyPDFLoader(str(path))
+        return PyPDFLoader(str(path))
 
     elif suffix == ".txt":
-        loader = TextLoader(str(path), encoding="utf-8")
+        return TextLoader(str(path), encoding="utf-8")
 
     elif suffix in [".md", ".markdown"]:
-        loader = UnstructuredMarkdownLoader(str(path))
+        return UnstructuredMarkdownLoader(str(path))
+
+    raise ValueError(f"Unsupported file type: {path.name}")
 
-    else:
-        raise ValueError(f"Unsupported file type: {path.name}")
 
-    docs = loader.load()
+def iter_pages(path: Path, source_file: str = None):
+    """
+    Yield pages one at a time (loader.lazy_load) with metadata attached.
+    source_file defaults to the file name (uploads are parsed from a
+    temporary path).
+    """
+    loader = make_loader(path)
+    file_type = path.suffix.lower().replace(".", "")
 
-    # attach metadata correctly
-    for d in docs:
-        d.metadata["source_file"] = path.name
-        d.metadata["file_type"] = suffix.replace(".", "")
+    for d in loader.lazy_load():
 
-    return docs
+        # attach metadata correctly
+        d.metadata["source_file"] = source_file or path.name
+        d.metadata["file_type"] = file_type
+
+        yield d
+
+
+def load_file(path: Path):
+    return list(iter_pages(path))
 
 
 # =========================================================
 # SPLIT DOCS
 # =========================================================
 
-def split_docs(docs):
+# stateless, so built once and reused for every page
+splitter = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP,
+    separators=["\n\n", "\n", ". ", " "],
+)
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        separators=["\n\n", "\n", ". ", " "],
-    )
+
+def split_docs(docs):
 
     chunks = splitter.split_documents(docs)
 
@@ -74,98 +105,461 @@ def split_docs(docs):
 
 
 # =========================================================
-# STORE IN QDRANT (CRITICAL FIX HERE)
+# STABLE CHUNK IDS
 # =========================================================
 
-def embed_and_store(chunks):
+def chunk_hash(text: str):
+    """
+    Content hash of a chunk, used to detect unchanged chunks.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
-    )
 
-    client = QdrantClient(QDRANT_URL)
+def chunk_point_id(source_file: str, content_hash: str):
+    """
+    Deterministic point id: same file + same text -> same id.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source_file}:{content_hash}"))
 
-    print("📐 Creating embeddings...")
 
-    texts = [c.page_content for c in chunks]
-    vectors = embeddings.embed_documents(texts)
+# =========================================================
+# BATCHED UPLOAD
+# =========================================================
 
-    # recreate collection cleanly
-    if client.collection_exists(COLLECTION_NAME):
-        print("🗑 Collection exists. Deleting...")
-        client.delete_collection(COLLECTION_NAME)
+def batched(iterable, size: int):
 
-    print("🗄 Creating collection...")
+    it = iter(iterable)
 
-    client.create_collection(
-        collection_name=COLLECTION_NAME,
-        vectors_config=models.VectorParams(
-            size=len(vectors[0]),
-            distance=models.Distance.COSINE,
-        ),
-    )
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def store_batch_metadata(batch):
+    """
+    Mirror a batch of points into Mongo with a single bulk write.
+    """
+    store_doc_metadata_bulk([
+        {
+            "doc_id": p.id,
+            "source_file": p.payload["metadata"]["source_file"],
+            "chunk_id": p.payload["metadata"]["chunk_id"],
+            "metadata": p.payload["metadata"]
+        }
+        for p in batch
+    ])
+
+
+def upsert_batch(store: VectorStore, batch, retries: int = UPSERT_RETRIES):
+    """
+    Upsert one batch (vectors + Mongo metadata), retrying with exponential backoff.
+    """
+    for attempt in range(retries + 1):
+
+        try:
+            store.upsert(batch)
+            store_batch_metadata(batch)
+            return len(batch)
+
+        except Exception as e:
+
+            if attempt == retries:
+                raise
+
+            delay = 0.5 * 2 ** attempt
+            print(f"⚠️ Upsert of {len(batch)} points failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def no_progress(stage, **counts):
+    pass
+
+
+def upload_points(
+    store: VectorStore,
+    points,
+    batch_size: int = UPSERT_BATCH_SIZE,
+    parallel: int = UPSERT_PARALLEL,
+    retries: int = UPSERT_RETRIES,
+    progress=no_progress,
+):
+    """
+    Upload an iterable of PointStruct in batches.
+
+    At most `parallel` batches are in flight, so only
+    batch_size * parallel points are held in memory at once.
+    """
+    def finished(done):
+        count = sum(f.result() for f in done)
+        progress("upserting", points_upserted=count)
+        return count
+
+    start = time.perf_counter()
+
+    uploaded = 0
+    batches = 0
+    in_flight = set()
 
-    print("⬆ Uploading vectors...")
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
 
-    points = []
+        for batch in batched(points, batch_size):
 
-    for i, (vec, doc) in enumerate(zip(vectors, chunks)):
+            if len(in_flight) >= parallel:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                uploaded += finished(done)
 
-        doc_id = str(uuid.uuid4())
+            in_flight.add(pool.submit(upsert_batch, store, batch, retries))
+            batches += 1
 
-        # ✅ NESTED PAYLOAD (LangChain-compatible)
-        payload = {
-    "page_content": doc.page_content,
-    "metadata": {
-        "source_file": doc.metadata.get("source_file", "unknown"),
-        "file_type": doc.metadata.get("file_type", "unknown"),
-        "chunk_id": i
+        uploaded += finished(in_flight)
+
+    seconds = time.perf_counter() - start
+    rate = uploaded / seconds if seconds > 0 else 0.0
+
+    print(f"⬆ Uploaded {uploaded} points in {batches} batches ({rate:.0f} points/sec)")
+
+    return {
+        "points": uploaded,
+        "batches": batches,
+        "seconds": seconds
     }
-}
 
-        points.append(
-            models.PointStruct(
-                id=doc_id,
+
+# =========================================================
+# BOUNDED STAGE QUEUES
+# =========================================================
+
+_END = object()
+
+
+class _StageError:
+
+    def __init__(self, error):
+        self.error = error
+
+
+def threaded(iterable, maxsize: int):
+    """
+    Run a generator stage in its own thread behind a bounded queue.
+
+    Stages overlap, and at most `maxsize` items wait between two stages,
+    so memory stays flat however large the input is.
+    """
+    q = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_StageError(e))
+            return
+        put(_END)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    try:
+        while True:
+
+            item = q.get()
+
+            if item is _END:
+                return
+
+            if isinstance(item, _StageError):
+                raise item.error
+
+            yield item
+
+    finally:
+        # consumer finished or failed: release the producer thread
+        stop.set()
+
+
+# =========================================================
+# STREAMING STAGES
+# =========================================================
+
+def chunk_payload(source_file, doc, chunk_id, content_hash):
+
+    # ✅ NESTED PAYLOAD (LangChain-compatible)
+    return {
+        "page_content": doc.page_content,
+        "metadata": {
+            "source_file": source_file,
+            "file_type": doc.metadata.get("file_type", "unknown"),
+            "chunk_id": chunk_id,
+            "content_hash": content_hash,
+            # precomputed for confidence scoring (set intersection at query time)
+            "keywords": chunk_keywords(doc.page_content)
+        }
+    }
+
+
+def chunk_stage(store, lexical, pages, state, progress):
+    """
+    Pages -> new/changed chunks.
+
+    Unchanged chunks are counted and dropped here; the ids seen per
+    file are recorded in state["keep"] for stale-chunk deletion, and
+    unchanged chunks whose position changed in state["moved"].
+    Every chunk is also handed to the BM25 index, which skips the
+    ones it already has.
+    """
+    for page in pages:
+
+        state["pages"] += 1
+        progress("splitting", pages_parsed=1)
+
+        source_file = page.metadata.get("source_file", "unknown")
+
+        if source_file not in state["keep"]:
+            state["keep"][source_file] = set()
+            state["existing"][source_file] = store.chunk_ids(source_file)
+            state["lexical_existing"][source_file] = lexical.point_ids(source_file)
+            state["next_chunk"][source_file] = 0
+
+        keep = state["keep"][source_file]
+        existing = state["existing"][source_file]
+
+        lexical_batch = []
+
+        for doc in split_docs([page]):
+
+            chunk_id = state["next_chunk"][source_file]
+            state["next_chunk"][source_file] += 1
+            state["chunks"] += 1
+
+            content_hash = chunk_hash(doc.page_content)
+            point_id = chunk_point_id(source_file, content_hash)
+
+            progress("splitting", chunks_total=1)
+
+            # identical chunks inside a file collapse to one point
+            if point_id in keep:
+                continue
+
+            keep.add(point_id)
+
+            metadata = chunk_payload(source_file, doc, chunk_id, content_hash)["metadata"]
+
+            lexical_batch.append((point_id, doc.page_content, metadata))
+
+            if point_id in existing:
+
+                # text unchanged but shifted (e.g. a chunk inserted above it)
+                if existing[point_id] != chunk_id:
+                    state["moved"][point_id] = metadata
+
+                state["skipped"] += 1
+                progress("splitting", chunks_skipped=1)
+                continue
+
+            yield point_id, chunk_id, content_hash, doc
+
+        state["lexical_added"] += lexical.add_many(lexical_batch)
+
+
+def embed_stage(store, embeddings, items, embed_batch_size, progress):
+    """
+    Chunks -> PointStructs, embedded in micro-batches.
+    """
+    collection_ready = False
+
+    for batch in batched(items, embed_batch_size):
+
+        vectors = embeddings.embed_documents(
+            [doc.page_content for _, _, _, doc in batch]
+        )
+
+        progress("embedding", chunks_embedded=len(vectors))
+
+        if not collection_ready:
+            store.ensure(len(vectors[0]))
+            collection_ready = True
+
+        for (point_id, chunk_id, content_hash, doc), vec in zip(batch, vectors):
+
+            source_file = doc.metadata.get("source_file", "unknown")
+
+            yield models.PointStruct(
+                id=point_id,
                 vector=vec,
-                payload=payload
+                payload=chunk_payload(source_file, doc, chunk_id, content_hash)
             )
-        )
 
-        # store metadata in Mongo
-        store_doc_metadata(
-            doc_id=doc_id,
-            source_file=doc.metadata.get("source_file", "unknown"),
-            chunk_id=i,
-            metadata=payload["metadata"]  # ✅ pass the metadata dict
-        )
 
-    client.upsert(
-        collection_name=COLLECTION_NAME,
-        points=points,
+def refresh_moved(store, state):
+    """
+    Rewrite the chunk_id of unchanged chunks that moved within their file,
+    so chunk_ids stay unique and consecutive (context merging relies on it).
+    """
+    moved = state["moved"]
+
+    if moved:
+        print(f"🔢 Updating chunk ids of {len(moved)} moved chunks...")
+        store.set_metadata(moved)
+        update_doc_metadata(moved)
+
+    return len(moved)
+
+
+def delete_stale(store, lexical, state):
+    """
+    Remove chunks that vanished from the re-ingested files.
+    Runs after all upserts so a file never has a window with no chunks.
+
+    Only ids seen before this run are deleted, never points written
+    by another ingest in the meantime.
+    """
+    deleted = 0
+
+    for source_file, keep in state["keep"].items():
+
+        lexical.delete(state["lexical_existing"][source_file] - keep)
+
+        stale = set(state["existing"][source_file]) - keep
+
+        if not stale:
+            continue
+
+        print(f"🗑 {source_file}: removing {len(stale)} stale chunks...")
+
+        store.delete(stale)
+        delete_doc_metadata(stale)
+
+        deleted += len(stale)
+
+    return deleted
+
+
+# =========================================================
+# STREAMING INGEST: load -> split -> embed -> upsert
+# =========================================================
+
+def stream_ingest(
+    pages,
+    progress=no_progress,
+    batch_size: int = UPSERT_BATCH_SIZE,
+    parallel: int = UPSERT_PARALLEL,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+):
+    """
+    Incrementally ingest an iterable of pages.
+
+    Each stage runs in its own thread connected by bounded queues:
+    pages flow into the splitter, new chunks into micro-batched
+    embedding, and points into batched vector-store upserts + Mongo writes.
+    Only per-file point ids are kept for the whole run.
+    """
+
+    # on-disk cache: byte-identical chunks are never re-embedded
+    embeddings = CachedEmbeddings(get_embedding_model())
+
+    # Qdrant or the in-process NumPy index (VECTOR_BACKEND)
+    store = get_vector_store()
+
+    # BM25 index kept in step with the collection
+    lexical = get_lexical_index()
+
+    # collections created before filtering existed get their payload
+    # indexes here, even if this run embeds nothing new
+    if store.exists():
+        store.ensure_payload_indexes()
+
+    state = {
+        "pages": 0,
+        "chunks": 0,
+        "skipped": 0,
+        "lexical_added": 0,
+        "keep": {},
+        "existing": {},
+        "lexical_existing": {},
+        "moved": {},
+        "next_chunk": {}
+    }
+
+    pages = threaded(pages, maxsize=STAGE_QUEUE_SIZE)
+
+    items = threaded(
+        chunk_stage(store, lexical, pages, state, progress),
+        maxsize=embed_batch_size * 2,
+    )
+
+    points = threaded(
+        embed_stage(store, embeddings, items, embed_batch_size, progress),
+        maxsize=batch_size,
+    )
+
+    upload = upload_points(
+        store,
+        points,
+        batch_size=batch_size,
+        parallel=parallel,
+        progress=progress,
+    )
+
+    moved = refresh_moved(store, state)
+    deleted = delete_stale(store, lexical, state)
+
+    seconds = upload["seconds"]
+
+    stats = {
+        "pages": state["pages"],
+        "chunks": state["chunks"],
+        "vectors": upload["points"],
+        "skipped": state["skipped"],
+        "moved": moved,
+        "deleted": deleted,
+        "lexical_added": state["lexical_added"],
+        "points_per_sec": round(upload["points"] / seconds, 1) if seconds > 0 else 0.0
+    }
+
+    stats.update(embeddings.stats())
+
+    print(
+        f"✅ Stored in {store.name} successfully "
+        f"({stats['vectors']} upserted, {stats['skipped']} unchanged, "
+        f"{stats['deleted']} removed)"
     )
 
-    print("✅ Stored in Qdrant successfully")
+    return stats
 
-    return len(points)
 
 # =========================================================
 # MAIN INGEST FUNCTION
 # =========================================================
 
-def ingest_file(path: Path):
+def ingest_file(path: Path, progress=no_progress, source_file: str = None):
+    """
+    progress(stage, **counts) receives stage changes and counter
+    increments (pages_parsed, chunks_total, chunks_embedded,
+    chunks_skipped, points_upserted).
+    """
 
-    print(f"\n📥 Ingesting file: {path.name}")
+    print(f"\n📥 Ingesting file: {source_file or path.name}")
 
-    docs = load_file(path)
+    progress("parsing")
 
-    chunks = split_docs(docs)
+    stats = stream_ingest(iter_pages(path, source_file), progress=progress)
 
-    count = embed_and_store(chunks)
+    # invalidates answer caches built against the old knowledge base
+    if stats["vectors"] or stats["moved"] or stats["deleted"] or stats["lexical_added"]:
+        bump_kb_version()
 
     print("🎉 Ingestion complete\n")
 
-    return {
-        "pages": len(docs),
-        "chunks": len(chunks),
-        "vectors": count
-    }
+    return stats
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import numpy as np
+
+from app.rag.kb_state import get_kb_version
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+# cosine similarity above which two questions share an answer
+ANSWER_CACHE_THRESHOLD = 0.95
+ANSWER_CACHE_SIZE = 512
+
+# safety net for ingests that happen outside this process (bulk script)
+ANSWER_CACHE_TTL = 3600
+
+
+# -------------------------
+# SEMANTIC ANSWER CACHE
+# -------------------------
+
+class SemanticAnswerCache:
+    """
+    Cache of /ask responses looked up by question embedding.
+
+    A new question reuses a cached response when its cosine similarity
+    to a cached question is above the threshold and k and the
+    retrieval scope (filters) match. All entries are dropped once the
+    knowledge-base version changes.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        max_size: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+    ):
+
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries = []
+        self._matrix = None
+        self._version = get_kb_version()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _unit(vector):
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def _check_version(self):
+
+        current = get_kb_version()
+
+        if current != self._version:
+            self._entries = []
+            self._matrix = None
+            self._version = current
+            self.invalidations += 1
+
+    def _rebuild(self):
+        self._matrix = (
+            np.stack([e["vector"] for e in self._entries])
+            if self._entries else None
+        )
+
+    def lookup(self, vector, k: int, scope=None):
+        """
+        Return a cached response dict or None.
+        """
+        query = self._unit(vector)
+
+        with self._lock:
+
+            self._check_version()
+
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            now = time.time()
+            sims = self._matrix @ query
+
+            for idx in np.argsort(-sims):
+
+                if sims[idx] < self.threshold:
+                    break
+
+                entry = self._entries[idx]
+
+                if (
+                    entry["k"] == k
+                    and entry["scope"] == scope
+                    and now - entry["created"] <= self.ttl
+                ):
+                    self.hits += 1
+                    return dict(entry["response"])
+
+            self.misses += 1
+            return None
+
+    def store(self, vector, k: int, response: dict, scope=None):
+
+        with self._lock:
+
+            self._check_version()
+
+            self._entries.append({
+                "vector": self._unit(vector),
+                "k": k,
+                "scope": scope,
+                "response": dict(response),
+                "created": time.time()
+            })
+
+            # oldest entries go first
+            if len(self._entries) > self.max_size:
+                self._entries = self._entries[-self.max_size:]
+
+            self._rebuild()
+
+    def stats(self):
+
+        with self._lock:
+
+            total = self.hits + self.misses
+
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "kb_version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
@@ -0,0 +1,128 @@
+from collections import Counter
+from concurrent.futures import Future
+import os
+import queue
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+# how long the first query in a batch waits for company
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+
+
+# -------------------------
+# MICRO-BATCHING EMBEDDINGS
+# -------------------------
+
+class MicroBatchEmbeddings(Embeddings):
+    """
+    Coalesces concurrent embed_query calls into one embed_documents call.
+
+    Callers block on a Future while a single worker thread collects
+    queries for up to EMBED_MAX_WAIT_MS (or EMBED_MAX_BATCH queries),
+    embeds the distinct texts in one forward pass and fans the vectors
+    back out. Document embedding passes straight through.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_wait_ms: float = EMBED_MAX_WAIT_MS,
+        max_batch: int = EMBED_MAX_BATCH,
+    ):
+
+        self.embeddings = embeddings
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.queries = 0
+        self.coalesced = 0
+        self.histogram = Counter()
+
+        self._worker = threading.Thread(
+            target=self._run,
+            name="embed-batcher",
+            daemon=True,
+        )
+        self._worker.start()
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+
+        future = Future()
+        self._queue.put((text, future))
+
+        return future.result()
+
+    def _next_batch(self):
+
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch:
+
+            remaining = deadline - time.perf_counter()
+
+            if remaining <= 0:
+                break
+
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+
+        while True:
+
+            batch = self._next_batch()
+
+            # identical in-flight questions share one vector
+            texts = list(dict.fromkeys(text for text, _ in batch))
+
+            try:
+                vectors = dict(zip(texts, self.embeddings.embed_documents(texts)))
+
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+            with self._lock:
+                self.batches += 1
+                self.queries += len(batch)
+                self.coalesced += len(batch) - len(texts)
+                self.histogram[len(texts)] += 1
+
+    def stats(self):
+
+        with self._lock:
+
+            return {
+                "max_wait_ms": self.max_wait * 1000,
+                "max_batch": self.max_batch,
+                "batches": self.batches,
+                "queries": self.queries,
+                "coalesced": self.coalesced,
+                "avg_batch_size": round((self.queries - self.coalesced) / self.batches, 2) if self.batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.histogram.items()))
+            }
@@ -0,0 +1,227 @@
+import math
+import re
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+# context tokens sent to Mistral (question + instructions not included)
+CONTEXT_TOKEN_BUDGET = 1500
+
+# rough chars-per-token for English prose with the Mistral tokenizer
+CHARS_PER_TOKEN = 4
+
+# the splitter overlaps neighbours by up to CHUNK_OVERLAP (100) chars
+MAX_OVERLAP_CHARS = 200
+MIN_OVERLAP_CHARS = 20
+
+# word 3-gram Jaccard above which two blocks count as the same text
+NEAR_DUPLICATE_THRESHOLD = 0.9
+
+
+# -------------------------
+# HELPERS
+# -------------------------
+
+WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def doc_source(doc):
+    return (doc.metadata or {}).get("source_file", "Unknown Source")
+
+
+def doc_chunk_id(doc):
+    return (doc.metadata or {}).get("chunk_id")
+
+
+def doc_key(doc):
+    """
+    Identity of a retrieved chunk: chunk_ids are positional and can
+    repeat across re-ingests, content hashes cannot.
+    """
+    content_hash = (doc.metadata or {}).get("content_hash")
+
+    if content_hash is None:
+        return id(doc)
+
+    return doc_source(doc), content_hash
+
+
+def strip_overlap(previous: str, text: str):
+    """
+    Drop the start of text that repeats the end of previous.
+    """
+    longest = min(MAX_OVERLAP_CHARS, len(previous), len(text))
+
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:]
+
+    return text
+
+
+def overlaps(previous: str, text: str):
+    return strip_overlap(previous, text) != text
+
+
+def shingles(text: str):
+
+    words = WORD_RE.findall(text.lower())
+
+    if len(words) < 3:
+        return {tuple(words)}
+
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def jaccard(a: set, b: set):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+# -------------------------
+# BLOCKS
+# -------------------------
+
+def neighbour(by_position, used, doc, step):
+    """
+    Unused retrieved chunk right before (step=-1) or after (step=1) doc
+    whose text overlaps it, as the splitter leaves consecutive chunks.
+    """
+    position = (doc_source(doc), doc_chunk_id(doc) + step)
+
+    for other in by_position.get(position, []):
+
+        if doc_key(other) in used:
+            continue
+
+        first, second = (other, doc) if step < 0 else (doc, other)
+
+        if overlaps(first.page_content, second.page_content):
+            return other
+
+    return None
+
+
+def merge_runs(docs):
+    """
+    Group retrieved chunks into blocks of consecutive chunk_ids from the
+    same source_file, joined with the splitter overlap removed. Chunks
+    are only merged when their texts overlap; every retrieved chunk
+    ends up in exactly one block.
+
+    Blocks keep the rank of their best chunk, so the retrieval (or
+    rerank) order is preserved.
+    """
+    by_position = {}
+
+    for doc in docs:
+        if doc_chunk_id(doc) is not None:
+            by_position.setdefault((doc_source(doc), doc_chunk_id(doc)), []).append(doc)
+
+    used = set()
+    blocks = []
+
+    for doc in docs:
+
+        # repeated chunks (same content hash) collapse to one
+        if doc_key(doc) in used:
+            continue
+
+        used.add(doc_key(doc))
+        run = [doc]
+
+        if doc_chunk_id(doc) is not None:
+
+            while True:
+                before = neighbour(by_position, used, run[0], -1)
+                if before is None:
+                    break
+                used.add(doc_key(before))
+                run.insert(0, before)
+
+            while True:
+                after = neighbour(by_position, used, run[-1], 1)
+                if after is None:
+                    break
+                used.add(doc_key(after))
+                run.append(after)
+
+        text = run[0].page_content
+
+        for part in run[1:]:
+            text += strip_overlap(text, part.page_content)
+
+        blocks.append({"source": doc_source(doc), "docs": run, "text": text})
+
+    return blocks
+
+
+def drop_near_duplicates(blocks):
+
+    kept = []
+    seen = []
+
+    for block in blocks:
+
+        grams = shingles(block["text"])
+
+        if any(jaccard(grams, other) >= NEAR_DUPLICATE_THRESHOLD for other in seen):
+            continue
+
+        kept.append(block)
+        seen.append(grams)
+
+    return kept
+
+
+# -------------------------
+# CONTEXT BUILDER
+# -------------------------
+
+def build_context(docs, token_budget: int = CONTEXT_TOKEN_BUDGET):
+    """
+    Merge, deduplicate and pack ranked chunks into a prompt context.
+
+    Returns the context string, the chunks that made it in and the
+    estimated context tokens.
+    """
+    blocks = merge_runs(docs)
+    unique = drop_near_duplicates(blocks)
+
+    parts = []
+    used_docs = []
+    tokens = 0
+
+    for block in unique:
+
+        part = f"[Source: {block['source']}]\n{block['text']}"
+        cost = estimate_tokens(part)
+
+        if tokens + cost > token_budget:
+
+            # always keep something from the best block
+            if parts:
+                continue
+
+            part = part[:token_budget * CHARS_PER_TOKEN]
+            cost = estimate_tokens(part)
+
+        parts.append(part)
+        used_docs.extend(block["docs"])
+        tokens += cost
+
+    context = "\n\n".join(parts)
+
+    return {
+        "context": context,
+        "docs": used_docs,
+        "tokens": estimate_tokens(context),
+        "chunks_in": len(docs),
+        "blocks": len(parts),
+        "duplicates_dropped": len(blocks) - len(unique)
+    }
@@ -0,0 +1,205 @@
+from pathlib import Path
+import argparse
+import os
+
+import numpy as np
+
+from langchain_core.embeddings import Embeddings
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# torch | onnx | onnx-int8
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+ONNX_DIR = Path(os.getenv("ONNX_MODEL_DIR", "data/models/all-MiniLM-L6-v2-onnx"))
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+# all-MiniLM-L6-v2 is trained with 256-token inputs
+MAX_SEQ_LENGTH = 256
+ONNX_BATCH_SIZE = 32
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+# -------------------------
+# ONNX RUNTIME BACKEND
+# -------------------------
+
+class OnnxEmbeddings(Embeddings):
+    """
+    all-MiniLM-L6-v2 exported to ONNX and run with onnxruntime on CPU.
+
+    Reproduces the sentence-transformers pipeline (mean pooling over
+    the attention mask + L2 normalization), so vectors are
+    interchangeable with the PyTorch backend.
+    """
+
+    def __init__(
+        self,
+        model_dir: Path = ONNX_DIR,
+        quantized: bool = False,
+        batch_size: int = ONNX_BATCH_SIZE,
+    ):
+
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        model_path = model_dir / (ONNX_INT8_FILE if quantized else ONNX_FILE)
+
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"{model_path} not found, export it with: "
+                f"python -m app.rag.embeddings --export"
+            )
+
+        self.model_name = f"{EMBEDDING_MODEL}:{'onnx-int8' if quantized else 'onnx'}"
+        self.batch_size = batch_size
+
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed(self, texts):
+
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=MAX_SEQ_LENGTH,
+            return_tensors="np",
+        )
+
+        feeds = {
+            name: encoded[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self.input_names
+        }
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # mean pooling over real tokens
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts):
+
+        vectors = []
+
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed(texts[start:start + self.batch_size]).tolist())
+
+        return vectors
+
+    def embed_query(self, text):
+        return self._embed([text])[0].tolist()
+
+
+# -------------------------
+# FACTORY
+# -------------------------
+
+def get_embedding_model(backend: str = None):
+    """
+    Embedding model used everywhere (API, ingest, CLI engine).
+    Pick the backend with EMBEDDING_BACKEND.
+    """
+    backend = backend or EMBEDDING_BACKEND
+
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+    if backend == "onnx":
+        return OnnxEmbeddings(quantized=False)
+
+    if backend == "onnx-int8":
+        return OnnxEmbeddings(quantized=True)
+
+    raise ValueError(f"Unknown embedding backend: {backend} (expected one of {BACKENDS})")
+
+
+# -------------------------
+# EXPORT
+# -------------------------
+
+def export_onnx(output_dir: Path = ONNX_DIR, quantize: bool = True):
+    """
+    Export the PyTorch model to ONNX, optionally adding a dynamic
+    int8-quantized copy next to it.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+    model = AutoModel.from_pretrained(EMBEDDING_MODEL).eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic = {0: "batch", 1: "sequence"}
+
+    print(f"📦 Exporting {EMBEDDING_MODEL} to {output_dir / ONNX_FILE}...")
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(output_dir / ONNX_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                **{name: dynamic for name in input_names},
+                "last_hidden_state": dynamic,
+            },
+            opset_version=14,
+        )
+
+    tokenizer.save_pretrained(str(output_dir))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"📦 Quantizing to {output_dir / ONNX_INT8_FILE}...")
+
+        quantize_dynamic(
+            str(output_dir / ONNX_FILE),
+            str(output_dir / ONNX_INT8_FILE),
+            weight_type=QuantType.QInt8,
+        )
+
+    print("✅ Export complete")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Embedding backend utilities")
+    parser.add_argument("--export", action="store_true", help="export the ONNX model")
+    parser.add_argument("--no-quantize", action="store_true", help="skip the int8 copy")
+    parser.add_argument("--output-dir", type=Path, default=ONNX_DIR)
+    args = parser.parse_args()
+
+    if args.export:
+        export_onnx(args.output_dir, quantize=not args.no_quantize)
+    else:
+        parser.print_help()
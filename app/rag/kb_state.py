@@ -0,0 +1,26 @@
+import threading
+
+
+# -------------------------
+# KNOWLEDGE-BASE VERSION
+# -------------------------
+
+# Bumped every time ingestion changes the collection. Caches that depend
+# on retrieval results store the version they were built against and
+# treat anything older as stale.
+
+_version = 0
+_lock = threading.Lock()
+
+
+def get_kb_version():
+    return _version
+
+
+def bump_kb_version():
+
+    global _version
+
+    with _lock:
+        _version += 1
+        return _version
@@ -0,0 +1,85 @@
+import re
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+KEYWORD_RE = re.compile(r"\b[a-z]{4,}\b")
+
+STOPWORDS = frozenset({
+    "what", "when", "where", "which", "their", "there",
+    "about", "policy", "please", "tell", "does", "have",
+    "this", "that", "with", "from"
+})
+
+
+# -------------------------
+# KEYWORDS
+# -------------------------
+
+def fold(word: str):
+    """
+    Fold simple plurals so "days" matches "day" and "policies" matches "policy".
+    """
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+
+    return word
+
+
+def extract_keywords(text: str):
+    """
+    Keywords of a question (or any text): lowercase words of four or
+    more letters, minus stopwords, plural-folded.
+    """
+    keywords = set()
+
+    for word in KEYWORD_RE.findall(text.lower()):
+
+        folded = fold(word)
+
+        if word not in STOPWORDS and folded not in STOPWORDS:
+            keywords.add(folded)
+
+    return keywords
+
+
+def chunk_keywords(text: str):
+    """
+    Sorted keyword list stored in the chunk payload at ingest.
+    """
+    return sorted(extract_keywords(text))
+
+
+def doc_keywords(doc):
+    """
+    Precomputed keywords from the payload, computed on the fly for
+    chunks ingested before they were stored.
+    """
+    stored = (doc.metadata or {}).get("keywords")
+
+    if stored is not None:
+        return set(stored)
+
+    return extract_keywords(doc.page_content)
+
+
+def keyword_coverage(question: str, docs):
+    """
+    (question keywords found in the chunks, question keywords).
+    """
+    keywords = extract_keywords(question)
+
+    if not keywords:
+        return 0, 0
+
+    found = set()
+
+    for doc in docs:
+        found |= keywords & doc_keywords(doc)
+
+    return len(found), len(keywords)
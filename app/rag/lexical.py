@@ -0,0 +1,292 @@
+from collections import Counter
+from pathlib import Path
+import math
+import re
+import sqlite3
+import threading
+
+from langchain_core.documents import Document
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+LEXICAL_INDEX_PATH = Path("data/cache/lexical.sqlite3")
+
+# BM25 parameters (Robertson defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# SQLite limits the number of "?" parameters per statement
+LOOKUP_BATCH = 500
+
+
+# -------------------------
+# TOKENIZER
+# -------------------------
+
+# keeps policy codes and form numbers ("hr-101", "w-4", "3.2") as one token
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does",
+    "for", "from", "how", "i", "if", "in", "is", "it", "me", "my", "of",
+    "on", "or", "our", "that", "the", "their", "there", "this", "to",
+    "was", "we", "what", "when", "where", "which", "who", "will", "with",
+    "you", "your",
+})
+
+
+def tokenize(text: str):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+# -------------------------
+# BM25 INDEX
+# -------------------------
+
+class LexicalIndex:
+    """
+    BM25 inverted index over chunk text, persisted in SQLite.
+
+    Written by the ingest pipeline (same point ids as Qdrant), read by
+    the API for hybrid retrieval. Safe to share across threads and
+    between the API and the bulk ingest process.
+    """
+
+    def __init__(self, path: Path = LEXICAL_INDEX_PATH):
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " point_id TEXT PRIMARY KEY,"
+            " source_file TEXT NOT NULL,"
+            " file_type TEXT,"
+            " chunk_id INTEGER,"
+            " content_hash TEXT,"
+            " text TEXT NOT NULL,"
+            " length INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL,"
+            " point_id TEXT NOT NULL,"
+            " tf INTEGER NOT NULL,"
+            " PRIMARY KEY (term, point_id)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_postings_point ON postings (point_id)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks (source_file)"
+        )
+        self._conn.commit()
+
+    # ---------- writes (ingest) ----------
+
+    def add_many(self, chunks):
+        """
+        Index (point_id, text, metadata) tuples. Already indexed point
+        ids are left alone, like unchanged chunks in Qdrant, apart from
+        their chunk_id, which follows the chunk's current position.
+        """
+        added = 0
+
+        with self._lock:
+
+            for point_id, text, meta in chunks:
+
+                terms = Counter(tokenize(text))
+
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO chunks "
+                    "(point_id, source_file, file_type, chunk_id, content_hash, text, length) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        point_id,
+                        meta["source_file"],
+                        meta.get("file_type"),
+                        meta.get("chunk_id"),
+                        meta.get("content_hash"),
+                        text,
+                        sum(terms.values()),
+                    ),
+                )
+
+                if cur.rowcount != 1:
+                    self._conn.execute(
+                        "UPDATE chunks SET chunk_id = ? WHERE point_id = ? AND chunk_id IS NOT ?",
+                        (meta.get("chunk_id"), point_id, meta.get("chunk_id")),
+                    )
+                    continue
+
+                self._conn.executemany(
+                    "INSERT INTO postings (term, point_id, tf) VALUES (?, ?, ?)",
+                    [(term, point_id, tf) for term, tf in terms.items()],
+                )
+                added += 1
+
+            self._conn.commit()
+
+        return added
+
+    def point_ids(self, source_file: str):
+
+        with self._lock:
+            return {
+                pid for (pid,) in self._conn.execute(
+                    "SELECT point_id FROM chunks WHERE source_file = ?",
+                    (source_file,),
+                )
+            }
+
+    def delete(self, point_ids):
+
+        point_ids = list(point_ids)
+
+        with self._lock:
+            self._delete(point_ids)
+            self._conn.commit()
+
+        return len(point_ids)
+
+    def _delete(self, point_ids):
+
+        for start in range(0, len(point_ids), LOOKUP_BATCH):
+
+            batch = point_ids[start:start + LOOKUP_BATCH]
+            marks = ",".join("?" * len(batch))
+
+            self._conn.execute(f"DELETE FROM postings WHERE point_id IN ({marks})", batch)
+            self._conn.execute(f"DELETE FROM chunks WHERE point_id IN ({marks})", batch)
+
+    def clear(self):
+
+        with self._lock:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.commit()
+
+    # ---------- reads (API) ----------
+
+    def search(self, query: str, k: int = 6, filters=None):
+        """
+        Top-k (Document, bm25 score) pairs for the query, optionally
+        restricted to a source_file / file_type.
+
+        Corpus statistics (N, average length, df) stay global, so
+        scores are comparable with or without filters.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))[:LOOKUP_BATCH]
+
+        if not terms:
+            return []
+
+        marks = ",".join("?" * len(terms))
+
+        scope = ""
+        scope_args = []
+
+        for field in ("source_file", "file_type"):
+            value = (filters or {}).get(field)
+            if value is not None:
+                scope += f" AND c.{field} = ?"
+                scope_args.append(value)
+
+        with self._lock:
+
+            n_docs, total_length = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks"
+            ).fetchone()
+
+            if n_docs == 0:
+                return []
+
+            df = dict(self._conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({marks}) GROUP BY term",
+                terms,
+            ).fetchall())
+
+            rows = self._conn.execute(
+                f"SELECT p.term, p.point_id, p.tf, c.length FROM postings p "
+                f"JOIN chunks c ON c.point_id = p.point_id WHERE p.term IN ({marks}){scope}",
+                [*terms, *scope_args],
+            ).fetchall()
+
+        avg_length = total_length / n_docs or 1.0
+        scores = Counter()
+
+        for term, point_id, tf, length in rows:
+
+            idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+
+            scores[point_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        top = scores.most_common(k)
+        docs = self._documents([pid for pid, _ in top])
+
+        return [(doc, score) for doc, (_, score) in zip(docs, top)]
+
+    def _documents(self, point_ids):
+
+        if not point_ids:
+            return []
+
+        marks = ",".join("?" * len(point_ids))
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT point_id, source_file, file_type, chunk_id, content_hash, text "
+                f"FROM chunks WHERE point_id IN ({marks})",
+                point_ids,
+            ).fetchall()
+
+        by_id = {
+            pid: Document(
+                page_content=text,
+                metadata={
+                    "source_file": source_file,
+                    "file_type": file_type,
+                    "chunk_id": chunk_id,
+                    "content_hash": content_hash
+                },
+            )
+            for pid, source_file, file_type, chunk_id, content_hash, text in rows
+        }
+
+        return [by_id[pid] for pid in point_ids]
+
+    def stats(self):
+
+        with self._lock:
+            chunks, terms = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM chunks), "
+                "(SELECT COUNT(DISTINCT term) FROM postings)"
+            ).fetchone()
+
+        return {"chunks": chunks, "terms": terms}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index():
+    """
+    Process-wide index shared by ingest jobs and the API.
+    """
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            _index = LexicalIndex()
+
+    return _index
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+import threading
+
+from langchain_core.embeddings import Embeddings
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+QUERY_CACHE_SIZE = 2048
+
+
+# -------------------------
+# KEYS
+# -------------------------
+
+def normalize_query(text: str):
+    """
+    all-MiniLM-L6-v2 uses an uncased tokenizer, so case and
+    whitespace differences map to the same vector.
+    """
+    return " ".join(text.lower().split())
+
+
+# -------------------------
+# LRU QUERY EMBEDDINGS
+# -------------------------
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Size-bounded LRU cache of normalized query -> vector in front
+    of an embeddings model. Document embedding passes straight through.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_size: int = QUERY_CACHE_SIZE):
+
+        self.embeddings = embeddings
+        self.max_size = max_size
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+
+        key = normalize_query(text)
+
+        with self._lock:
+
+            vector = self._cache.get(key)
+
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            self.misses += 1
+
+        # model call happens outside the lock
+        vector = self.embeddings.embed_query(key)
+
+        with self._lock:
+
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        return vector
+
+    def stats(self):
+
+        with self._lock:
+
+            total = self.hits + self.misses
+
+            return {
+                "size": len(self._cache),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
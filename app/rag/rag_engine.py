@@ -2,19 +2,9 @@ from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_qdrant import QdrantVectorStore
-
-
-from qdrant_client import QdrantClient
-
-
-# -------------------------
-# CONFIG
-# -------------------------
-
-QDRANT_URL = "http://localhost:6333"
-COLLECTION_NAME = "hr_knowledge_base"
+from app.db.vector_store import get_vector_store
+from app.rag.embeddings import get_embedding_model
+from app.rag.retriever import AsyncVectorRetriever
 
 
 # -------------------------
@@ -22,20 +12,12 @@ COLLECTION_NAME = "hr_knowledge_base"
 # -------------------------
 
 def get_vectorstore():
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
-    )
-
-    client = QdrantClient(QDRANT_URL)
-
-    vectorstore = QdrantVectorStore(
-    client=client,
-    collection_name=COLLECTION_NAME,
-    embedding=embeddings,
-)
-
 
-    return vectorstore
+    # same backend as the API (VECTOR_BACKEND)
+    return AsyncVectorRetriever(
+        store=get_vector_store(),
+        embeddings=get_embedding_model(),
+    )
 
 
 # -------------------------
@@ -84,12 +66,8 @@ def format_docs(docs):
 
 def main():
 
-    print("\n🔎 Connecting to Qdrant...")
-    vectorstore = get_vectorstore()
-
-    retriever = vectorstore.as_retriever(
-        search_kwargs={"k": 6}
-    )
+    print("\n🔎 Connecting to vector store...")
+    retriever = get_vectorstore()
 
     chain = build_chain(retriever)
 
@@ -102,7 +80,7 @@ def main():
         if question.lower() in ["exit", "quit"]:
             break
 
-        docs = retriever.invoke(question)
+        docs = retriever.similarity_search(question, k=6)
         context = format_docs(docs)
 
         answer = chain.invoke({
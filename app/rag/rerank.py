@@ -0,0 +1,191 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "1") == "1"
+
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# candidates pulled from Qdrant, and how many of them reach the prompt
+RERANK_FETCH_K = 20
+RERANK_TOP_N = 4
+
+# past this the vector-search order is used instead
+RERANK_BUDGET_MS = 300
+
+RERANK_MAX_LENGTH = 256
+
+# dedicated threads for the cross-encoder (not the default executor used
+# for query embeddings); requests arriving while all are busy skip reranking
+RERANK_WORKERS = int(os.getenv("RERANK_WORKERS", "1"))
+
+# only rerank as many candidates as fit this share of the budget,
+# based on the measured time per pair
+RERANK_BUDGET_TARGET = 0.8
+
+
+# -------------------------
+# CROSS-ENCODER RERANKER
+# -------------------------
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+class Reranker:
+    """
+    Scores (question, chunk) pairs with a CPU cross-encoder in one batch.
+
+    Scores are sigmoid(logit), so they land in 0..1 and can feed
+    compute_confidence directly.
+
+    Runs on its own bounded thread pool. A timed-out batch cannot be
+    stopped, so while the pool is busy new requests skip reranking
+    instead of queueing more work, and the time spent on abandoned
+    batches is reported as wasted_ms.
+    """
+
+    def __init__(
+        self,
+        model_name: str = RERANK_MODEL,
+        budget_ms: float = RERANK_BUDGET_MS,
+        workers: int = RERANK_WORKERS,
+    ):
+
+        import torch
+        from sentence_transformers import CrossEncoder
+
+        # raw logits; the sigmoid is applied below
+        self.model = CrossEncoder(
+            model_name,
+            max_length=RERANK_MAX_LENGTH,
+            device="cpu",
+            default_activation_function=torch.nn.Identity(),
+        )
+
+        self.budget = budget_ms / 1000
+        self.workers = workers
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rerank")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        # running average, used to cap the candidates per call
+        self.ms_per_pair = None
+
+        self.calls = 0
+        self.timeouts = 0
+        self.skipped_busy = 0
+        self.abandoned = 0
+        self.wasted_ms = 0.0
+        self.total_ms = 0.0
+
+    def rerank(self, query: str, docs, top_n: int = RERANK_TOP_N):
+        """
+        Return the top_n (doc, score) pairs, best first.
+        """
+        started = time.perf_counter()
+
+        logits = self.model.predict(
+            [(query, d.page_content) for d in docs],
+            batch_size=len(docs),
+            show_progress_bar=False,
+        )
+
+        scores = sigmoid(np.asarray(logits, dtype=np.float32))
+        order = np.argsort(-scores)[:top_n]
+
+        ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.calls += 1
+            self.total_ms += ms
+
+            per_pair = ms / len(docs)
+            self.ms_per_pair = per_pair if self.ms_per_pair is None else (
+                0.8 * self.ms_per_pair + 0.2 * per_pair
+            )
+
+        return [(docs[i], float(scores[i])) for i in order]
+
+    def max_candidates(self, top_n: int):
+        """
+        Candidates that fit the budget at the measured speed (at least top_n).
+        """
+        if not self.ms_per_pair:
+            return None
+
+        fit = int(self.budget * 1000 * RERANK_BUDGET_TARGET / self.ms_per_pair)
+
+        return max(top_n, fit)
+
+    async def arerank(self, query: str, docs, top_n: int = RERANK_TOP_N):
+        """
+        rerank() on the reranker pool, bounded by the latency budget.
+        Returns None when the budget is exceeded or the pool is busy;
+        callers fall back to the vector-search order.
+        """
+        with self._lock:
+
+            if self._in_flight >= self.workers:
+                self.skipped_busy += 1
+                return None
+
+            self._in_flight += 1
+
+        # best retrieval candidates first, as many as fit the budget
+        docs = docs[:self.max_candidates(top_n)]
+
+        job = {"started": time.perf_counter(), "abandoned": False}
+
+        def finished(future):
+            with self._lock:
+                self._in_flight -= 1
+                if job["abandoned"] and not future.cancelled():
+                    self.wasted_ms += (time.perf_counter() - job["started"]) * 1000
+
+        future = self._pool.submit(self.rerank, query, docs, top_n)
+        future.add_done_callback(finished)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.budget)
+
+        except asyncio.TimeoutError:
+
+            with self._lock:
+                self.timeouts += 1
+
+                # still running: it finishes in the background, for nothing
+                if not future.done():
+                    job["abandoned"] = True
+                    self.abandoned += 1
+
+            return None
+
+    def stats(self):
+
+        with self._lock:
+
+            return {
+                "model": RERANK_MODEL,
+                "budget_ms": self.budget * 1000,
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "skipped_busy": self.skipped_busy,
+                "abandoned": self.abandoned,
+                "wasted_ms": round(self.wasted_ms, 1),
+                "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+                "ms_per_pair": round(self.ms_per_pair, 2) if self.ms_per_pair else None,
+                "max_candidates": self.max_candidates(RERANK_TOP_N)
+            }
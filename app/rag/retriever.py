@@ -0,0 +1,131 @@
+import asyncio
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.db.vector_store import VectorStore
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+# standard reciprocal rank fusion constant
+RRF_K = 60
+
+
+# -------------------------
+# RANK FUSION
+# -------------------------
+
+def chunk_key(doc: Document):
+    meta = doc.metadata or {}
+    return meta.get("source_file"), meta.get("content_hash") or doc.page_content
+
+
+def reciprocal_rank_fusion(dense, lexical, k: int, rrf_k: int = RRF_K):
+    """
+    Fuse two ranked (doc, score) lists by sum of 1 / (rrf_k + rank).
+
+    Fused results keep their dense score (cosine similarity, higher is
+    better); lexical-only hits get the lowest dense similarity seen, or
+    0 without dense hits, so confidence never rises from BM25 alone.
+    """
+    fused = {}
+    floor = min((score for _, score in dense), default=0.0)
+
+    for results in (dense, lexical):
+        for rank, (doc, _) in enumerate(results, start=1):
+            entry = fused.setdefault(chunk_key(doc), {"doc": doc, "rrf": 0.0, "score": floor})
+            entry["rrf"] += 1 / (rrf_k + rank)
+
+    for doc, score in dense:
+        fused[chunk_key(doc)]["score"] = score
+
+    ranked = sorted(fused.values(), key=lambda e: e["rrf"], reverse=True)
+
+    return [(e["doc"], e["score"]) for e in ranked[:k]]
+
+
+# -------------------------
+# ASYNC RETRIEVER
+# -------------------------
+
+class AsyncVectorRetriever:
+    """
+    Dense (optionally hybrid) retrieval over a VectorStore backend.
+
+    Mirrors the parts of QdrantVectorStore the API uses, but the
+    search is awaited and the CPU-bound query embedding runs in a
+    worker thread, so the event loop is never blocked.
+
+    With a lexical index, searches fuse BM25 and dense results (RRF).
+    """
+
+    def __init__(
+        self,
+        store: VectorStore,
+        embeddings: Embeddings,
+        content_payload_key: str = "page_content",
+        metadata_payload_key: str = "metadata",
+        lexical=None,
+    ):
+
+        self.store = store
+        self.embeddings = embeddings
+        self.content_payload_key = content_payload_key
+        self.metadata_payload_key = metadata_payload_key
+        self.lexical = lexical
+
+    async def aembed_query(self, query: str):
+        return await asyncio.to_thread(self.embeddings.embed_query, query)
+
+    def _to_document(self, payload):
+
+        payload = payload or {}
+
+        return Document(
+            page_content=payload.get(self.content_payload_key, ""),
+            metadata=payload.get(self.metadata_payload_key) or {},
+        )
+
+    async def asimilarity_search_with_score_by_vector(self, vector, k: int = 4, filters=None):
+
+        hits = await self.store.asearch(vector, k, filters)
+
+        return [(self._to_document(payload), score) for _, score, payload in hits]
+
+    async def asearch_with_score(self, query: str, vector, k: int = 4, filters=None):
+        """
+        Dense search, fused with BM25 when a lexical index is attached.
+        filters optionally scopes both to a source_file / file_type.
+        """
+        if self.lexical is None:
+            return await self.asimilarity_search_with_score_by_vector(vector, k, filters)
+
+        dense, lexical = await asyncio.gather(
+            self.asimilarity_search_with_score_by_vector(vector, k, filters),
+            asyncio.to_thread(self.lexical.search, query, k, filters),
+        )
+
+        return reciprocal_rank_fusion(dense, lexical, k)
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 4, filters=None):
+
+        vector = await self.aembed_query(query)
+
+        return await self.asearch_with_score(query, vector, k, filters)
+
+    async def asimilarity_search(self, query: str, k: int = 4, filters=None):
+
+        results = await self.asimilarity_search_with_score(query, k, filters)
+
+        return [doc for doc, _ in results]
+
+    def similarity_search(self, query: str, k: int = 4, filters=None):
+        """
+        Blocking dense search for scripts (CLI engine).
+        """
+        hits = self.store.search(self.embeddings.embed_query(query), k, filters)
+
+        return [self._to_document(payload) for _, _, payload in hits]
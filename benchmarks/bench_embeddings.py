@@ -0,0 +1,148 @@
+"""
+Compare embedding backends on the HR corpus.
+
+Reports document throughput, single-query latency and retrieval
+agreement (top-k overlap with the PyTorch backend).
+
+    python -m app.rag.embeddings --export
+    python benchmarks/bench_embeddings.py --backends torch onnx onnx-int8
+"""
+
+from pathlib import Path
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.ingest.pipeline import load_file, split_docs
+from app.rag.embeddings import BACKENDS, get_embedding_model
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+CORPUS_DIRS = [Path("data/hr_docs"), Path("data/uploads")]
+
+QUERIES = [
+    "How many sick days do employees get?",
+    "What is the notice period for resignation?",
+    "Can unused PTO be carried over to next year?",
+    "What is the maternity leave policy?",
+    "How do I apply for annual leave?",
+    "What are the working hours?",
+    "Is remote work allowed?",
+    "What is the probation period for new employees?",
+    "How are overtime hours compensated?",
+    "What happens during employee onboarding?",
+]
+
+
+# -------------------------
+# HELPERS
+# -------------------------
+
+def load_corpus():
+
+    chunks = []
+
+    for folder in CORPUS_DIRS:
+        for path in sorted(folder.glob("**/*")):
+            if path.suffix.lower() in (".pdf", ".txt", ".md", ".markdown"):
+                chunks.extend(split_docs(load_file(path)))
+
+    return [c.page_content for c in chunks]
+
+
+def unit(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def top_k(doc_vectors, query_vectors, k):
+    scores = query_vectors @ doc_vectors.T
+    return [set(np.argsort(-row)[:k]) for row in scores]
+
+
+def bench_backend(name, texts, repeats):
+
+    started = time.perf_counter()
+    model = get_embedding_model(name)
+    load_seconds = time.perf_counter() - started
+
+    # warm-up outside the measurements
+    model.embed_documents(texts[:8])
+    model.embed_query(QUERIES[0])
+
+    started = time.perf_counter()
+    doc_vectors = model.embed_documents(texts)
+    doc_seconds = time.perf_counter() - started
+
+    latencies = []
+
+    for _ in range(repeats):
+        for q in QUERIES:
+            started = time.perf_counter()
+            model.embed_query(q)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+
+    return {
+        "load_s": load_seconds,
+        "docs_per_s": len(texts) / doc_seconds,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "doc_vectors": unit(doc_vectors),
+        "query_vectors": unit([model.embed_query(q) for q in QUERIES]),
+    }
+
+
+# -------------------------
+# MAIN
+# -------------------------
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = load_corpus()
+    print(f"Corpus: {len(texts)} chunks, {len(QUERIES)} queries, k={args.k}\n")
+
+    results = {}
+
+    for name in args.backends:
+        print(f"Benchmarking {name}...")
+        results[name] = bench_backend(name, texts, args.repeats)
+
+    baseline = results.get("torch") or results[args.backends[0]]
+    base_hits = top_k(baseline["doc_vectors"], baseline["query_vectors"], args.k)
+
+    header = f"{'backend':<10} {'load s':>7} {'docs/s':>8} {'p50 ms':>7} {'p95 ms':>7} {'cos':>6} {'top-k overlap':>14}"
+    print("\n" + header)
+    print("-" * len(header))
+
+    for name, r in results.items():
+
+        hits = top_k(r["doc_vectors"], r["query_vectors"], args.k)
+        overlap = np.mean([len(a & b) / args.k for a, b in zip(hits, base_hits)])
+
+        # per-chunk agreement of the raw vectors
+        cosine = float(np.mean(np.sum(r["doc_vectors"] * baseline["doc_vectors"], axis=1)))
+
+        print(
+            f"{name:<10} {r['load_s']:>7.2f} {r['docs_per_s']:>8.1f} "
+            f"{r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} {cosine:>6.4f} {overlap:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Compare Qdrant collection layouts on the HR corpus.
+
+For each layout (float32 / int8 quantization with and without rescoring,
+on-disk vectors, smaller HNSW graphs) and each search-time hnsw_ef, reports
+memory, query latency and recall@k against exact search.
+
+"RSS MB" is measured: the growth of the Qdrant server's resident memory
+(memory_resident_bytes from /metrics) while the collection is built, so
+it includes payload, segment and quantization overhead. It is only
+meaningful on a Qdrant instance nothing else is using. "est MB" is the
+back-of-envelope size of vectors + HNSW links from the config alone.
+
+Needs a running Qdrant; creates and drops bench_* collections.
+
+    python benchmarks/bench_qdrant.py --scale 20
+"""
+
+from pathlib import Path
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from qdrant_client import QdrantClient, models
+
+from app.ingest.embedding_cache import CachedEmbeddings
+from app.db.vector_store import QDRANT_URL, collection_config, search_params
+from app.rag.embeddings import get_embedding_model
+from bench_embeddings import QUERIES, load_corpus
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+LAYOUTS = [
+    # name, collection_config overrides, rescore
+    ("float32", {}, False),
+    ("int8", {"quantization": "int8"}, False),
+    ("int8+rescore", {"quantization": "int8"}, True),
+    ("int8+rescore+disk", {"quantization": "int8", "vectors_on_disk": True, "payload_on_disk": True}, True),
+    ("float32 m=8", {"m": 8, "ef_construct": 64}, False),
+]
+
+HNSW_EFS = [16, 64, 128]
+
+UPLOAD_BATCH = 256
+
+
+# -------------------------
+# DATA
+# -------------------------
+
+def unit(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def build_vectors(scale, n_queries, seed=0):
+    """
+    Corpus vectors (optionally replicated with noise to simulate a
+    larger knowledge base) and query vectors.
+    """
+    rng = np.random.default_rng(seed)
+    embeddings = CachedEmbeddings(get_embedding_model())
+
+    texts = load_corpus()
+    base = unit(embeddings.embed_documents(texts))
+
+    copies = [base] + [
+        unit(base + rng.normal(0, 0.05, base.shape).astype(np.float32))
+        for _ in range(scale - 1)
+    ]
+    corpus = np.concatenate(copies)
+
+    # real HR questions plus perturbed chunks as extra queries
+    questions = unit([embeddings.embed_query(q) for q in QUERIES])
+    picks = base[rng.integers(0, len(base), max(0, n_queries - len(questions)))]
+    extra = unit(picks + rng.normal(0, 0.1, picks.shape).astype(np.float32))
+
+    return corpus, np.concatenate([questions, extra]), len(texts)
+
+
+# -------------------------
+# QDRANT
+# -------------------------
+
+def create(client, name, vectors, overrides):
+
+    if client.collection_exists(name):
+        client.delete_collection(name)
+
+    config = collection_config(vectors.shape[1], **overrides)
+
+    client.create_collection(
+        collection_name=name,
+        # build the HNSW graph even for a small corpus
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),
+        **config,
+    )
+
+    started = time.perf_counter()
+
+    for start in range(0, len(vectors), UPLOAD_BATCH):
+        batch = vectors[start:start + UPLOAD_BATCH]
+        client.upsert(
+            collection_name=name,
+            points=models.Batch(
+                ids=list(range(start, start + len(batch))),
+                vectors=batch.tolist(),
+            ),
+            wait=True,
+        )
+
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        time.sleep(0.5)
+
+    return time.perf_counter() - started
+
+
+def server_resident_mb(url):
+    """
+    Resident memory of the Qdrant server, or None if /metrics doesn't
+    report it (older servers, telemetry disabled).
+    """
+    try:
+        text = requests.get(f"{url}/metrics", timeout=10).text
+    except requests.RequestException:
+        return None
+
+    for line in text.splitlines():
+        if line.startswith("memory_resident_bytes "):
+            return float(line.split()[1]) / 1024 / 1024
+
+    return None
+
+
+def estimated_ram_mb(n, dim, overrides):
+    """
+    Config-only estimate: vectors kept in RAM + HNSW level-0 links.
+    Ignores payload, segment and quantization bookkeeping.
+    """
+    m = overrides.get("m", 16)
+    total = n * m * 2 * 4
+
+    if not overrides.get("vectors_on_disk"):
+        total += n * dim * 4
+
+    if overrides.get("quantization") == "int8":
+        total += n * dim
+
+    return total / 1024 / 1024
+
+
+def search(client, name, queries, k, params):
+
+    latencies = []
+    results = []
+
+    for q in queries:
+        started = time.perf_counter()
+        points = client.search(
+            collection_name=name,
+            query_vector=q.tolist(),
+            limit=k,
+            search_params=params,
+            with_payload=False,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append({p.id for p in points})
+
+    latencies.sort()
+
+    return results, statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))]
+
+
+# -------------------------
+# MAIN
+# -------------------------
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="noisy corpus copies")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--keep", action="store_true", help="keep bench_* collections")
+    args = parser.parse_args()
+
+    client = QdrantClient(QDRANT_URL, timeout=120)
+
+    corpus, queries, n_chunks = build_vectors(args.scale, args.queries)
+    n, dim = corpus.shape
+
+    print(f"Corpus: {n_chunks} chunks x{args.scale} = {n} vectors ({dim}d), "
+          f"{len(queries)} queries, k={args.k}\n")
+
+    header = (
+        f"{'layout':<20} {'hnsw_ef':>7} {'RSS MB':>7} {'est MB':>7} {'build s':>8} "
+        f"{'p50 ms':>7} {'p95 ms':>7} {'recall':>7}"
+    )
+
+    truth = None
+    rows = []
+
+    for name, overrides, rescore in LAYOUTS:
+
+        collection = "bench_" + "".join(c if c.isalnum() else "_" for c in name)
+        rss_before = server_resident_mb(QDRANT_URL)
+        build_seconds = create(client, collection, corpus, overrides)
+        rss_after = server_resident_mb(QDRANT_URL)
+
+        if rss_before is None or rss_after is None:
+            rss = f"{'n/a':>7}"
+        else:
+            rss = f"{rss_after - rss_before:>7.1f}"
+
+        if truth is None:
+            truth, _, _ = search(client, collection, queries, args.k, models.SearchParams(exact=True))
+
+        for ef in HNSW_EFS:
+
+            found, p50, p95 = search(
+                client, collection, queries, args.k,
+                search_params(hnsw_ef=ef, rescore=rescore),
+            )
+
+            recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth) if t])
+
+            rows.append(
+                f"{name:<20} {ef:>7} {rss} {estimated_ram_mb(n, dim, overrides):>7.1f} "
+                f"{build_seconds:>8.1f} {p50:>7.2f} {p95:>7.2f} {recall:>7.3f}"
+            )
+
+        if not args.keep:
+            client.delete_collection(collection)
+
+    print(header)
+    print("-" * len(header))
+    print("\n".join(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Compare vector-store backends on the HR corpus.
+
+Runs the Qdrant backend and the in-process NumPy index (float32 and
+float16) through the same VectorStore interface used by ingestion and
+the API, and reports upsert time, size, query latency (with and
+without a source_file filter) and recall@k against exact search.
+
+Needs a running Qdrant unless --skip-qdrant is given; creates and
+drops a bench_vector_store collection.
+
+    python benchmarks/bench_vector_store.py --scale 20
+"""
+
+from pathlib import Path
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from qdrant_client import models
+
+from app.db.numpy_store import NumpyStore
+from app.db.vector_store import QdrantStore
+from bench_qdrant import build_vectors
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+
+COLLECTION_NAME = "bench_vector_store"
+
+# synthetic source files, so filtered search touches ~1/N of the corpus
+SOURCE_FILES = 10
+
+UPLOAD_BATCH = 256
+
+
+# -------------------------
+# DATA
+# -------------------------
+
+def point_id(i):
+    return str(uuid.UUID(int=i))
+
+
+def source_file(i):
+    return f"policy_{i % SOURCE_FILES}.pdf"
+
+
+def build_points(vectors):
+    return [
+        models.PointStruct(
+            id=point_id(i),
+            vector=vector.tolist(),
+            payload={
+                "page_content": "",
+                "metadata": {"source_file": source_file(i), "file_type": "pdf"},
+            },
+        )
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def exact_top_k(corpus, queries, k, filters=None):
+    """
+    Ground truth: brute-force cosine on the float32 vectors.
+    """
+    scores = queries @ corpus.T
+
+    if filters:
+        keep = np.array([source_file(i) == filters["source_file"] for i in range(len(corpus))])
+        scores[:, ~keep] = -np.inf
+
+    top = np.argsort(-scores, axis=1)[:, :k]
+
+    return [{point_id(int(i)) for i in row} for row in top]
+
+
+def dir_size_mb(path):
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file()) / 1024 / 1024
+
+
+# -------------------------
+# BENCH
+# -------------------------
+
+def load(store, points, dim):
+
+    store.drop()
+    store.ensure(dim)
+
+    started = time.perf_counter()
+
+    for start in range(0, len(points), UPLOAD_BATCH):
+        store.upsert(points[start:start + UPLOAD_BATCH])
+
+    return time.perf_counter() - started
+
+
+def search(store, queries, k, filters=None):
+
+    latencies = []
+    results = []
+
+    # first query pays view loading / connection setup
+    store.search(queries[0].tolist(), k, filters)
+
+    for q in queries:
+        started = time.perf_counter()
+        hits = store.search(q.tolist(), k, filters)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append({pid for pid, _, _ in hits})
+
+    latencies.sort()
+
+    return results, statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))]
+
+
+def recall(found, truth):
+    return np.mean([len(f & t) / len(t) for f, t in zip(found, truth) if t])
+
+
+# -------------------------
+# MAIN
+# -------------------------
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="noisy corpus copies")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--skip-qdrant", action="store_true", help="only benchmark the NumPy index")
+    args = parser.parse_args()
+
+    corpus, queries, n_chunks = build_vectors(args.scale, args.queries)
+    n, dim = corpus.shape
+    points = build_points(corpus)
+
+    scope = {"source_file": source_file(0)}
+
+    truth = exact_top_k(corpus, queries, args.k)
+    scoped_truth = exact_top_k(corpus, queries, args.k, scope)
+
+    print(f"Corpus: {n_chunks} chunks x{args.scale} = {n} vectors ({dim}d), "
+          f"{len(queries)} queries, k={args.k}\n")
+
+    header = (
+        f"{'backend':<16} {'upsert s':>8} {'size MB':>8} {'p50 ms':>7} {'p95 ms':>7} "
+        f"{'recall':>7} {'filt p50':>8} {'filt rec':>8}"
+    )
+
+    rows = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        backends = [
+            ("numpy float32", lambda: NumpyStore(Path(tmp) / "float32", "float32")),
+            ("numpy float16", lambda: NumpyStore(Path(tmp) / "float16", "float16")),
+        ]
+
+        if not args.skip_qdrant:
+            backends.insert(0, ("qdrant", lambda: QdrantStore(collection_name=COLLECTION_NAME)))
+
+        for name, make in backends:
+
+            store = make()
+            upsert_seconds = load(store, points, dim)
+
+            found, p50, p95 = search(store, queries, args.k)
+            scoped, scoped_p50, _ = search(store, queries, args.k, scope)
+
+            # Qdrant keeps its own storage; report raw float32 vectors for it
+            size = dir_size_mb(store.path) if isinstance(store, NumpyStore) else n * dim * 4 / 1024 / 1024
+
+            rows.append(
+                f"{name:<16} {upsert_seconds:>8.2f} {size:>8.1f} {p50:>7.2f} {p95:>7.2f} "
+                f"{recall(found, truth):>7.3f} {scoped_p50:>8.2f} {recall(scoped, scoped_truth):>8.3f}"
+            )
+
+            store.drop()
+
+    print(header)
+    print("-" * len(header))
+    print("\n".join(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+from langchain_core.documents import Document
+
+from app.rag.context import build_context, merge_runs, strip_overlap
+
+
+def chunk(text, chunk_id, source_file="leave.pdf"):
+    return Document(
+        page_content=text,
+        metadata={
+            "source_file": source_file,
+            "chunk_id": chunk_id,
+            "content_hash": f"{source_file}:{text}",
+        },
+    )
+
+
+FIRST = "Employees accrue sick leave monthly. Sick leave can be carried over up to ten days each year."
+SECOND = "carried over up to ten days each year. Unused days are not paid out when an employee leaves."
+
+
+def test_strip_overlap_removes_splitter_overlap():
+    assert strip_overlap(FIRST, SECOND) == " Unused days are not paid out when an employee leaves."
+
+
+def test_consecutive_overlapping_chunks_merge():
+
+    blocks = merge_runs([chunk(SECOND, 4), chunk(FIRST, 3)])
+
+    assert len(blocks) == 1
+    assert blocks[0]["text"] == FIRST + " Unused days are not paid out when an employee leaves."
+    assert [d.metadata["chunk_id"] for d in blocks[0]["docs"]] == [3, 4]
+
+
+def test_consecutive_ids_without_overlap_stay_separate():
+
+    blocks = merge_runs([chunk(FIRST, 3), chunk("Remote work needs manager approval.", 4)])
+
+    assert len(blocks) == 2
+
+
+def test_colliding_chunk_ids_keep_both_chunks():
+
+    # after an incremental re-ingest two different chunks can share a chunk_id
+    a = chunk("Parental leave is sixteen weeks at full pay for all staff.", 5)
+    b = chunk("Bereavement leave is five days for immediate family members.", 5)
+
+    packed = build_context([a, b])
+
+    assert packed["docs"] == [a, b]
+    assert a.page_content in packed["context"]
+    assert b.page_content in packed["context"]
+
+
+def test_repeated_chunk_is_packed_once():
+
+    a = chunk(FIRST, 3)
+
+    packed = build_context([a, chunk(FIRST, 3)])
+
+    assert packed["docs"] == [a]
+    assert packed["context"].count(FIRST) == 1
+
+
+def test_near_duplicates_are_dropped():
+
+    a = chunk(FIRST, 1, "a.pdf")
+    b = chunk(FIRST + " ", 1, "b.pdf")
+
+    packed = build_context([a, b])
+
+    assert packed["docs"] == [a]
+    assert packed["duplicates_dropped"] == 1
+
+
+def test_token_budget_keeps_best_block_only():
+
+    docs = [chunk(f"Policy {i}: " + "x" * 400, i * 10) for i in range(3)]
+
+    packed = build_context(docs, token_budget=150)
+
+    assert packed["docs"] == docs[:1]
+    assert packed["tokens"] <= 150
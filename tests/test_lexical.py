@@ -0,0 +1,75 @@
+import pytest
+
+from app.rag.lexical import LexicalIndex, tokenize
+
+
+def meta(source_file, chunk_id, file_type="pdf"):
+    return {"source_file": source_file, "file_type": file_type, "chunk_id": chunk_id, "content_hash": f"h{chunk_id}"}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LexicalIndex(tmp_path / "lexical.sqlite3")
+    index.add_many([
+        ("p1", "Sick leave is ten days per year.", meta("leave.pdf", 0)),
+        ("p2", "Annual leave carries over up to five days.", meta("leave.pdf", 1)),
+        ("p3", "Submit form HR-101 for travel expenses.", meta("travel.md", 0, "md")),
+        ("p4", "The notice period is thirty days.", meta("exit.txt", 0, "txt")),
+    ])
+    return index
+
+
+def test_tokenize_keeps_codes_and_drops_stopwords():
+    assert tokenize("What is form HR-101 for the W-4?") == ["form", "hr-101", "w-4"]
+
+
+def test_search_ranks_by_bm25(index):
+
+    hits = index.search("sick leave", k=3)
+
+    assert [d.metadata["source_file"] for d, _ in hits] == ["leave.pdf", "leave.pdf"]
+    assert hits[0][0].page_content.startswith("Sick leave")
+    assert hits[0][1] > hits[1][1] > 0
+
+
+def test_search_matches_policy_codes(index):
+
+    doc, _ = index.search("hr-101", k=1)[0]
+
+    assert doc.metadata == {"source_file": "travel.md", "file_type": "md", "chunk_id": 0, "content_hash": "h0"}
+
+
+def test_filters_restrict_results_not_scores(index):
+
+    unfiltered = dict((d.page_content, s) for d, s in index.search("days", k=5))
+    filtered = index.search("days", k=5, filters={"file_type": "txt"})
+
+    assert [d.metadata["source_file"] for d, _ in filtered] == ["exit.txt"]
+    assert filtered[0][1] == pytest.approx(unfiltered[filtered[0][0].page_content])
+
+
+def test_add_many_skips_known_ids_but_refreshes_chunk_id(index):
+
+    added = index.add_many([
+        ("p1", "Sick leave is ten days per year.", meta("leave.pdf", 5)),
+        ("p5", "Parental leave is sixteen weeks.", meta("leave.pdf", 6)),
+    ])
+
+    assert added == 1
+    assert index.stats()["chunks"] == 5
+    assert index.search("sick", k=1)[0][0].metadata["chunk_id"] == 5
+
+
+def test_delete_and_clear(index):
+
+    assert index.point_ids("leave.pdf") == {"p1", "p2"}
+
+    index.delete(["p1"])
+
+    assert index.point_ids("leave.pdf") == {"p2"}
+    assert index.search("sick", k=3) == []
+
+    index.clear()
+
+    assert index.stats() == {"chunks": 0, "terms": 0}
+    assert index.search("leave", k=3) == []
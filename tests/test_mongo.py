@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from app.db import mongo
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """
+    Point the module-level collections at an in-memory mongomock database.
+    """
+    db = mongomock.MongoClient()[mongo.DB_NAME]
+
+    monkeypatch.setattr(mongo, "db", db)
+    monkeypatch.setattr(mongo, "docs_col", db[mongo.COLLECTION])
+    monkeypatch.setattr(mongo, "query_logs_col", db["query_logs"])
+    monkeypatch.setattr(mongo, "rollup_col", db[mongo.ROLLUP_COLLECTION])
+    monkeypatch.setattr(mongo, "question_counts_col", db[mongo.QUESTION_COUNTS])
+    monkeypatch.setattr(mongo, "source_counts_col", db[mongo.SOURCE_COUNTS])
+
+    # mongomock has no Collection.options(); these tests use regular collections
+    monkeypatch.setattr(mongo, "is_timeseries", lambda col: False)
+
+    return db
+
+
+def index_keys(col):
+    return {name: (info["key"], info.get("expireAfterSeconds")) for name, info in col.index_information().items()}
+
+
+def test_ensure_indexes_creates_query_indexes(db):
+
+    mongo.ensure_indexes()
+    mongo.ensure_indexes()
+
+    assert index_keys(db[mongo.COLLECTION])["source_file_1"] == ([("source_file", 1)], None)
+    assert db[mongo.COLLECTION].index_information()["doc_id_1"]["unique"]
+    assert index_keys(db[mongo.QUESTION_COUNTS])["count_-1"] == ([("count", -1)], None)
+    assert index_keys(db[mongo.SOURCE_COUNTS])["count_-1"] == ([("count", -1)], None)
+    assert index_keys(db["query_logs"])["timestamp_1"] == ([("timestamp", 1)], None)
+
+
+def test_ensure_indexes_sets_retention_ttl(db, monkeypatch):
+
+    monkeypatch.setattr(mongo, "QUERY_LOGS_RETENTION_DAYS", 30)
+
+    mongo.ensure_indexes()
+
+    assert index_keys(db["query_logs"])["timestamp_1"] == ([("timestamp", 1)], 30 * 86400)
+
+
+def test_retention_change_on_existing_index_uses_collmod(db, monkeypatch):
+
+    col = db["query_logs"]
+    col.create_index("timestamp")
+
+    def conflict(*args, **kwargs):
+        raise OperationFailure("IndexOptionsConflict", code=85)
+
+    commands = []
+
+    monkeypatch.setattr(col, "create_index", conflict)
+    monkeypatch.setattr(db, "command", lambda *args, **kwargs: commands.append((args, kwargs)))
+
+    mongo.ensure_retention_index(col, "timestamp", 3600)
+
+    assert commands == [(
+        ("collMod", "query_logs"),
+        {"index": {"keyPattern": {"timestamp": 1}, "expireAfterSeconds": 3600}}
+    )]
+
+
+def test_retention_reraises_other_index_errors(db, monkeypatch):
+
+    col = db["query_logs"]
+
+    def failure(*args, **kwargs):
+        raise OperationFailure("Unauthorized", code=13)
+
+    monkeypatch.setattr(col, "create_index", failure)
+
+    with pytest.raises(OperationFailure):
+        mongo.ensure_retention_index(col, "timestamp", 3600)
+
+
+def seed_logs(db):
+
+    db["query_logs"].insert_many([
+        mongo.query_record("leave policy?", "a", ["a.pdf"], 0.5),
+        mongo.query_record("leave policy?", "a", ["a.pdf", "b.pdf"], 0.7),
+        # already counted by the buffered logger
+        {**mongo.query_record("notice?", "a", ["b.pdf"], 1.0), mongo.ROLLED_UP_FIELD: True},
+    ])
+
+    for name, ops in mongo.rollup_ops([mongo.query_record("notice?", "a", ["b.pdf"], 1.0)]).items():
+        db[name].bulk_write(ops)
+
+
+def assert_backfilled():
+
+    analytics = mongo.get_query_analytics()
+
+    assert analytics["total_queries"] == 3
+    assert analytics["avg_confidence"] == pytest.approx(2.2 / 3, abs=1e-3)
+    assert analytics["top_questions"] == [("leave policy?", 2), ("notice?", 1)]
+    assert dict(analytics["top_sources"]) == {"a.pdf": 2, "b.pdf": 2}
+
+
+def test_backfill_folds_old_logs_once(db):
+
+    seed_logs(db)
+
+    assert mongo.backfill_query_rollups()
+    assert not mongo.backfill_query_rollups()
+
+    assert_backfilled()
+
+
+def test_backfill_write_failure_is_retried_without_double_counting(db, monkeypatch):
+
+    seed_logs(db)
+
+    sources = db[mongo.SOURCE_COUNTS]
+    bulk_write = sources.bulk_write
+
+    def down(*args, **kwargs):
+        raise AutoReconnect("connection lost")
+
+    # totals and question counts are written, then the connection drops
+    monkeypatch.setattr(sources, "bulk_write", down)
+
+    assert not mongo.backfill_query_rollups()
+    assert db[mongo.ROLLUP_COLLECTION].find_one({"_id": mongo.ROLLUP_BACKFILL_MARKER}) is None
+
+    monkeypatch.setattr(sources, "bulk_write", bulk_write)
+
+    assert mongo.backfill_query_rollups()
+    assert db[mongo.ROLLUP_COLLECTION].find_one({"_id": mongo.ROLLUP_BACKFILL_MARKER})["done"]
+
+    assert_backfilled()
+
+
+def test_backfill_resumes_a_stale_unfinished_claim(db):
+
+    seed_logs(db)
+
+    # a run that died after claiming the marker long ago
+    db[mongo.ROLLUP_COLLECTION].insert_one({
+        "_id": mongo.ROLLUP_BACKFILL_MARKER,
+        "started_at": datetime.utcnow() - timedelta(seconds=mongo.ROLLUP_BACKFILL_STALE_SECONDS + 1),
+        "done": False
+    })
+
+    assert mongo.backfill_query_rollups()
+
+    assert_backfilled()
+
+
+def test_backfill_leaves_a_fresh_claim_alone(db):
+
+    seed_logs(db)
+
+    db[mongo.ROLLUP_COLLECTION].insert_one({
+        "_id": mongo.ROLLUP_BACKFILL_MARKER,
+        "started_at": datetime.utcnow(),
+        "done": False
+    })
+
+    assert not mongo.backfill_query_rollups()
+    assert mongo.get_query_analytics()["total_queries"] == 1
@@ -0,0 +1,150 @@
+import threading
+
+import numpy as np
+import pytest
+from qdrant_client import models
+
+from app.db import numpy_store
+from app.db.numpy_store import NumpyStore
+
+
+DIM = 8
+
+
+def point(i, vector, source_file="a.pdf", file_type="pdf"):
+    return models.PointStruct(
+        id=f"p{i}",
+        vector=list(vector),
+        payload={
+            "page_content": f"chunk {i}",
+            "metadata": {"source_file": source_file, "file_type": file_type, "chunk_id": i},
+        },
+    )
+
+
+@pytest.fixture(params=["float32", "float16"])
+def store(tmp_path, request):
+    store = NumpyStore(tmp_path, request.param)
+    store.ensure(DIM)
+    return store
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(40, DIM)).astype(np.float32)
+
+
+def test_search_returns_exact_top_k(store, vectors):
+
+    store.upsert([point(i, v) for i, v in enumerate(vectors)])
+
+    query = vectors[7] + 0.01
+    hits = store.search(query.tolist(), 5)
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = [f"p{i}" for i in np.argsort(-(unit @ query))[:5]]
+
+    assert [pid for pid, _, _ in hits] == expected
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-2)
+    assert hits[0][2]["page_content"] == "chunk 7"
+
+
+def test_filtered_search_only_returns_matching_points(store, vectors):
+
+    store.upsert([
+        point(i, v, source_file="a.pdf" if i % 2 else "b.md", file_type="pdf" if i % 2 else "md")
+        for i, v in enumerate(vectors)
+    ])
+
+    hits = store.search(vectors[0].tolist(), 5, {"source_file": "a.pdf"})
+
+    assert len(hits) == 5
+    assert {p["metadata"]["source_file"] for _, _, p in hits} == {"a.pdf"}
+    assert store.search(vectors[0].tolist(), 5, {"file_type": "txt"}) == []
+
+
+def test_upsert_overwrites_existing_ids(store, vectors):
+
+    store.upsert([point(0, vectors[0])])
+    store.upsert([point(0, vectors[1])])
+
+    assert store.chunk_ids("a.pdf") == {"p0": 0}
+    assert store.search(vectors[1].tolist(), 1)[0][1] == pytest.approx(1.0, abs=1e-2)
+
+
+def test_delete_frees_rows_for_reuse(store, vectors):
+
+    store.upsert([point(i, v) for i, v in enumerate(vectors[:10])])
+    store.delete(["p2", "p5"])
+
+    assert set(store.chunk_ids("a.pdf")) == {f"p{i}" for i in range(10)} - {"p2", "p5"}
+    assert all(pid not in ("p2", "p5") for pid, _, _ in store.search(vectors[2].tolist(), 10))
+
+    store.upsert([point(10, vectors[10]), point(11, vectors[11]), point(12, vectors[12])])
+
+    # two freed rows reused, one appended
+    assert int(store._meta("rows")) == 11
+    assert store.search(vectors[11].tolist(), 1)[0][0] == "p11"
+
+
+def test_matrix_grows_past_initial_capacity(tmp_path, monkeypatch, vectors):
+
+    monkeypatch.setattr(numpy_store, "INITIAL_CAPACITY", 16)
+
+    store = NumpyStore(tmp_path)
+    store.ensure(DIM)
+    store.upsert([point(i, v) for i, v in enumerate(vectors)])
+
+    assert store._open_matrix().shape[0] >= len(vectors)
+    assert store.search(vectors[39].tolist(), 1)[0][0] == "p39"
+
+
+def test_set_metadata_and_reload_from_another_handle(tmp_path, vectors):
+
+    store = NumpyStore(tmp_path)
+    store.ensure(DIM)
+    store.upsert([point(i, v) for i, v in enumerate(vectors[:3])])
+
+    other = NumpyStore(tmp_path)
+    assert other.search(vectors[1].tolist(), 1)[0][0] == "p1"
+
+    store.set_metadata({"p1": {"source_file": "a.pdf", "file_type": "pdf", "chunk_id": 9}})
+    store.delete(["p1"])
+
+    assert other.chunk_ids("a.pdf") == {"p0": 0, "p2": 2}
+    assert other.search(vectors[1].tolist(), 1)[0][0] != "p1"
+
+
+def test_concurrent_writers_on_one_directory_keep_every_point(tmp_path):
+
+    NumpyStore(tmp_path).ensure(DIM)
+    rng = np.random.default_rng(1)
+
+    def write(prefix):
+        store = NumpyStore(tmp_path)
+        for start in range(0, 1000, 50):
+            store.upsert([
+                point(f"{prefix}{i}", rng.normal(size=DIM), source_file=prefix)
+                for i in range(start, start + 50)
+            ])
+
+    writers = [threading.Thread(target=write, args=(prefix,)) for prefix in ("a", "b")]
+
+    for t in writers:
+        t.start()
+    for t in writers:
+        t.join()
+
+    store = NumpyStore(tmp_path)
+
+    assert len(store.chunk_ids("a")) == len(store.chunk_ids("b")) == 1000
+    assert int(store._meta("rows")) == 2000
+
+
+def test_drop_empties_the_index(store, vectors):
+
+    store.upsert([point(i, v) for i, v in enumerate(vectors[:3])])
+    store.drop()
+
+    assert not store.exists()
+    assert store.search(vectors[0].tolist(), 3) == []
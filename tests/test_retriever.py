@@ -0,0 +1,35 @@
+from langchain_core.documents import Document
+
+from app.rag.retriever import reciprocal_rank_fusion
+
+
+def doc(text):
+    return Document(page_content=text, metadata={"source_file": "a.pdf", "content_hash": text})
+
+
+def test_rrf_orders_by_fused_rank_and_keeps_dense_scores():
+
+    dense = [(doc("a"), 0.9), (doc("b"), 0.8), (doc("c"), 0.4)]
+    lexical = [(doc("c"), 12.0), (doc("b"), 7.0)]
+
+    fused = reciprocal_rank_fusion(dense, lexical, k=3)
+
+    assert [d.page_content for d, _ in fused] == ["c", "b", "a"]
+    assert [score for _, score in fused] == [0.4, 0.8, 0.9]
+
+
+def test_rrf_lexical_only_hits_get_lowest_dense_similarity():
+
+    dense = [(doc("a"), 0.9), (doc("b"), 0.6)]
+    lexical = [(doc("hr-204"), 15.0)]
+
+    scores = dict((d.page_content, s) for d, s in reciprocal_rank_fusion(dense, lexical, k=3))
+
+    assert scores["hr-204"] == 0.6
+
+
+def test_rrf_without_dense_hits_scores_zero():
+
+    fused = reciprocal_rank_fusion([], [(doc("hr-204"), 15.0)], k=3)
+
+    assert fused[0][1] == 0.0
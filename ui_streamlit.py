@@ -1,14 +1,78 @@
+import json
+import time
+
 import streamlit as st
 import requests
 import pandas as pd
 
 API = "http://127.0.0.1:8000"
 
+
+# =====================================
+# SSE CLIENT
+# =====================================
+
+def stream_events(url, payload):
+    """
+    Yield (event, data) pairs from a Server-Sent Events endpoint.
+    """
+
+    with requests.post(url, json=payload, stream=True, timeout=300) as res:
+
+        res.raise_for_status()
+
+        event = "message"
+
+        for line in res.iter_lines(decode_unicode=True):
+
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+
+            elif line.startswith("data:"):
+                yield event, json.loads(line[len("data:"):].strip())
+                event = "message"
+
 st.set_page_config(
     page_title="HR Policy RAG Assistant",
     layout="wide"
 )
 
+# =====================================
+# INGEST JOB POLLING
+# =====================================
+
+def wait_for_job(job_id, poll_seconds=1.0):
+    """
+    Poll /jobs/{id} until the ingest finishes, showing stage progress.
+    """
+
+    bar = st.sidebar.progress(0.0, text="Queued...")
+
+    while True:
+
+        job = requests.get(f"{API}/jobs/{job_id}").json()
+        progress = job["progress"]
+
+        total = progress["chunks_total"]
+        done = progress["chunks_skipped"] + progress["points_upserted"]
+
+        bar.progress(
+            min(done / total, 1.0) if total else 0.0,
+            text=(
+                f"{job['stage'].capitalize()} · "
+                f"{progress['pages_parsed']} pages · "
+                f"{progress['chunks_embedded']} embedded · "
+                f"{progress['points_upserted']} upserted"
+            )
+        )
+
+        if job["status"] in ("done", "failed"):
+            bar.empty()
+            return job
+
+        time.sleep(poll_seconds)
+
+
 # =====================================
 # PAGE NAVIGATION
 # =====================================
@@ -50,7 +114,7 @@ if page == "💬 Chat Assistant":
 
         if st.session_state.current_file != file.name:
 
-            with st.sidebar.spinner("Uploading & indexing..."):
+            with st.sidebar.spinner("Uploading..."):
 
                 files = {
                     "file": (
@@ -65,7 +129,11 @@ if page == "💬 Chat Assistant":
                     files=files
                 )
 
-                if res.status_code == 200:
+            if res.status_code == 200 and "job_id" in res.json():
+
+                job = wait_for_job(res.json()["job_id"])
+
+                if job["status"] == "done":
 
                     st.session_state.current_file = file.name
                     st.session_state.messages = []  # clear old chat
@@ -75,7 +143,12 @@ if page == "💬 Chat Assistant":
                     )
 
                 else:
-                    st.sidebar.error("Upload failed ❌")
+                    st.sidebar.error(
+                        f"Indexing failed ❌ {job.get('error') or ''}"
+                    )
+
+            else:
+                st.sidebar.error("Upload failed ❌")
 
     # Show current file
     if st.session_state.current_file:
@@ -85,6 +158,12 @@ if page == "💬 Chat Assistant":
             f"✅ {st.session_state.current_file}"
         )
 
+    only_current = st.sidebar.checkbox(
+        "Only search this document",
+        value=False,
+        disabled=not st.session_state.current_file
+    )
+
 
     # -------- Chat display --------
 
@@ -112,29 +191,58 @@ if page == "💬 Chat Assistant":
 
         with st.chat_message("assistant"):
 
-            with st.spinner("Thinking..."):
+            final = {}
 
-                res = requests.post(
-                    f"{API}/ask",
-                    json={
+            def tokens():
+
+                events = stream_events(
+                    f"{API}/ask/stream",
+                    {
                         "question": prompt,
-                        "k": 6
+                        "k": 6,
+                        "source_file": (
+                            st.session_state.current_file
+                            if only_current else None
+                        )
                     }
                 )
 
-                data = res.json()
+                for event, data in events:
 
-                answer = data["answer"]
-                confidence = data.get(
-                    "confidence", 0
+                    if event == "token":
+                        yield data["token"]
+
+                    elif event == "done":
+                        final.update(data)
+
+                    elif event == "error":
+                        final["error"] = data["error"]
+
+            # tokens render as they arrive
+            streamed = st.write_stream(tokens())
+
+            if "error" in final:
+
+                st.error(
+                    f"Answer generation failed: {final['error']}"
                 )
 
-                st.markdown(answer)
+                answer = f"{streamed}\n\n⚠️ *Answer incomplete: generation failed.*"
 
-                st.caption(
-                    f"Confidence: {confidence:.3f}"
+            else:
+
+                answer = final.get("answer", streamed)
+                confidence = final.get(
+                    "confidence", 0
                 )
 
+                caption = f"Confidence: {confidence:.3f}"
+
+                if final.get("ttft_ms") is not None:
+                    caption += f" · first token {final['ttft_ms']:.0f} ms"
+
+                st.caption(caption)
+
         st.session_state.messages.append(
             {
                 "role": "assistant",